@@ -0,0 +1,191 @@
+# -*- encoding:utf8 -*-
+
+""" Streamed attachments for SendPulse REST API requests
+"""
+
+import io
+import os
+import re
+import mmap
+import uuid
+import base64
+import asyncio
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+# multiple of 3, so base64 encoded chunks can be concatenated without padding inside
+DEFAULT_CHUNK_SIZE = 3 * 64 * 1024
+
+
+class Attachment:
+    """ File sent base64 encoded without loading it into memory
+
+    File given by path is memory mapped, file-like object is read in chunks. Content is encoded chunk by chunk
+    every time request body is sent, so one attachment may be sent in many requests and retries.
+    Size is taken in constructor, file must not be changed while attachment is in use.
+    Attachments from path or from_bytes() may be sent by concurrent requests, file-like object may not.
+    """
+
+    def __init__(self, source, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Attachment constructor
+
+        @param source: string path to file or binary file-like object opened for reading.
+            Not seekable file-like object can be sent only once
+        @param chunk_size: unsigned int bytes encoded at once, rounded down to multiple of 3
+        """
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+        self.__path = None
+        self.__file = None
+        self.__start = None
+        self.__consumed = False
+        self.__encoded = None
+        if isinstance(source, (str, bytes, os.PathLike)):
+            self.__path = os.fspath(source)
+            self.size = os.path.getsize(self.__path)
+        else:
+            self.__file = source
+            self.size = None
+            if source.seekable():
+                self.__start = source.tell()
+                self.size = source.seek(0, os.SEEK_END) - self.__start
+                source.seek(self.__start)
+
+    @classmethod
+    def from_bytes(cls, content):
+        """ Attachment of content already loaded into memory, it is base64 encoded once and never copied
+
+        @param content: bytes file content
+        @return: Attachment object
+        """
+        attachment = cls(io.BytesIO())
+        attachment.size = len(content)
+        attachment.__encoded = base64.b64encode(content)
+        return attachment
+
+    @property
+    def encoded_size(self):
+        """ Length of base64 encoded content
+
+        @return: unsigned int or None if size of file-like object is unknown
+        """
+        return None if self.size is None else (self.size + 2) // 3 * 4
+
+    def __iter__(self):
+        """ Iterate over base64 encoded content
+
+        @return: generator of bytes chunks
+        @raise: Exception not seekable file-like object is read second time
+        """
+        if self.__encoded is not None:
+            return iter((self.__encoded, ) if self.__encoded else ())
+        if self.__path is not None:
+            return self.__iter_mapped()
+        return self.__iter_file()
+
+    def __iter_mapped(self):
+        with open(self.__path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for offset in range(0, len(data), self.chunk_size):
+                    yield base64.b64encode(data[offset:offset + self.chunk_size])
+
+    def __iter_file(self):
+        if self.__start is not None:
+            self.__file.seek(self.__start)
+        elif self.__consumed:
+            raise Exception("Attachment from not seekable file can be sent only once")
+        self.__consumed = True
+        rest = b''
+        while True:
+            chunk = self.__file.read(self.chunk_size)
+            if not chunk:
+                break
+            chunk = rest + chunk
+            cut = len(chunk) - len(chunk) % 3
+            rest = chunk[cut:]
+            if cut:
+                yield base64.b64encode(chunk[:cut])
+        if rest:
+            yield base64.b64encode(rest)
+
+
+class JsonStream:
+    """ JSON request body with attachments encoded into it on the fly
+
+    Objects are serialized with placeholders instead of Attachment objects, placeholders are replaced with
+    base64 content while body is sent. Base64 needs no JSON escaping, so attachments may be placed into
+    nested JSON strings as well, e.g. {'email': stream.dumps(email)}.
+    """
+
+    def __init__(self):
+        self.__marker = "pysendpulse{}n".format(uuid.uuid4().hex)
+        self.__attachments = []
+        self.__parts = None
+
+    def __placeholder(self, obj):
+        if not isinstance(obj, Attachment):
+            raise TypeError("Object of type {} is not JSON serializable".format(type(obj).__name__))
+        self.__attachments.append(obj)
+        return "{}{}n".format(self.__marker, len(self.__attachments) - 1)
+
+    def dumps(self, obj):
+        """ Serialize object, Attachment objects are replaced with placeholders
+
+        @param obj: object to serialize
+        @return: string JSON
+        """
+        return json.dumps(obj, default=self.__placeholder)
+
+    def body(self, obj):
+        """ Serialize request body
+
+        @param obj: object to serialize
+        @return: string JSON if there are no attachments, otherwise JsonStream object
+        """
+        return self.wrap(self.dumps(obj))
+
+    def wrap(self, body):
+        """ Make request body of JSON serialized by dumps() of this stream, may be called many times
+
+        @param body: string JSON with placeholders of this stream
+        @return: string JSON if there are no attachments, otherwise new JsonStream object sharing attachments
+        """
+        if not self.__attachments:
+            return body
+        stream = JsonStream()
+        stream.__marker = self.__marker
+        stream.__attachments = self.__attachments
+        stream.__parts = re.split("{}(\\d+)n".format(self.__marker), body)
+        return stream
+
+    @property
+    def len(self):
+        """ Length of request body, read by requests library to set Content-Length
+
+        @return: unsigned int or None if length of some attachment is unknown
+        """
+        sizes = [self.__attachments[int(index)].encoded_size for index in self.__parts[1::2]]
+        if None in sizes:
+            return None
+        return sum(sizes) + sum(len(part) for part in self.__parts[::2])
+
+    def __iter__(self):
+        for number, part in enumerate(self.__parts):
+            if number % 2:
+                for chunk in self.__attachments[int(part)]:
+                    yield chunk
+            elif part:
+                yield part.encode('utf-8')
+
+    async def __aiter__(self):
+        loop = asyncio.get_event_loop()
+        chunks = iter(self)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
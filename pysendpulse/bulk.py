@@ -0,0 +1,505 @@
+# -*- encoding:utf8 -*-
+
+""" Bulk helpers on top of PySendPulse: batching, concurrent calls and big addressbooks
+"""
+
+import os
+import abc
+import csv
+import time
+import random
+import logging
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from pysendpulse.rate_limiter import TokenBucket
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+
+def is_error(result):
+    """ Check if result returned by PySendPulse method is an error
+
+    @param result: value returned by PySendPulse method
+    @return: boolean
+    """
+    if isinstance(result, dict):
+        if result.get('is_error'):
+            return True
+        data = result.get('data')
+        return isinstance(data, dict) and bool(data.get('is_error'))
+    return False
+
+
+def is_retryable(result):
+    """ Check if failed call can be repeated: server errors, throttling and connection failures
+
+    @param result: value returned by PySendPulse method
+    @return: boolean
+    """
+    if not is_error(result):
+        return False
+    error = result['data'] if isinstance(result.get('data'), dict) else result
+    http_code = error.get('http_code')
+    if http_code is None:
+        return bool(error.get('exception'))
+    return http_code == 429 or http_code >= 500
+
+
+def iter_batches(items, max_count, max_bytes=None, size_of=None):
+    """ Split any iterable into lists limited by amount of items and by their serialized size
+
+    @param items: iterable, generators are consumed lazily
+    @param max_count: unsigned int max items in batch
+    @param max_bytes: unsigned int max serialized size of batch, not limited if not set
+    @param size_of: callable returning serialized size of one item, JSON length is used by default
+    @return: generator of lists
+    """
+    if not max_bytes:
+        iterator = iter(items)
+        batch = list(islice(iterator, max_count))
+        while batch:
+            yield batch
+            batch = list(islice(iterator, max_count))
+        return
+    if size_of is None:
+        size_of = lambda item: len(json.dumps(item)) + 1
+    batch, batch_bytes = [], 0
+    for item in items:
+        item_bytes = size_of(item)
+        if batch and (len(batch) >= max_count or batch_bytes + item_bytes > max_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(item)
+        batch_bytes += item_bytes
+    if batch:
+        yield batch
+
+
+def double_encoded_size(item):
+    """ Serialized size of list item for endpoints which take list as JSON string inside JSON body
+
+    Quotes of such item are escaped twice, e.g. emails of add_emails_to_addressbook and phones of sms_send.
+
+    @param item: JSON serializable list item
+    @return: unsigned int size with separator
+    """
+    return len(json.dumps(json.dumps(item))) - 1
+
+
+def iter_numbered_batches(items, max_count, max_bytes=None, size_of=None):
+    """ Split any iterable into batches like iter_batches and number them
+
+    @param items: iterable, generators are consumed lazily
+    @param max_count: unsigned int max items in batch
+    @param max_bytes: unsigned int max serialized size of batch, not limited if not set
+    @param size_of: callable returning serialized size of one item, JSON length is used by default
+    @return: generator of (number, offset, batch) tuples, offset is position of the first item of batch in items
+    """
+    offset = 0
+    for number, batch in enumerate(iter_batches(items, max_count, max_bytes, size_of)):
+        yield number, offset, batch
+        offset += len(batch)
+
+
+def run_concurrently(func, jobs, max_workers=4, rate_limiter=None, max_retries=0, retry_delay=1.0):
+    """ Call func for every job with bounded thread pool, retrying failed calls with exponential backoff
+
+    Only max_workers * 2 jobs are taken from iterable at a time, so memory does not grow with amount of jobs.
+    Exceptions raised by func are turned into error results.
+
+    @param func: callable taking one job and returning PySendPulse method result
+    @param jobs: iterable of jobs
+    @param max_workers: unsigned int max number of calls running at the same time
+    @param rate_limiter: TokenBucket object limiting calls per second, including retries
+    @param max_retries: unsigned int how many times failed call is repeated
+    @param retry_delay: float seconds before first retry, doubled on every next one
+    @return: generator of (job, result, attempts) tuples in completion order
+    """
+    def call(job):
+        attempts = 0
+        while True:
+            attempts += 1
+            if rate_limiter:
+                rate_limiter.acquire()
+            try:
+                result = func(job)
+            except Exception as e:
+                logger.warning("Bulk call failed: {}".format(e, ))
+                result = {'is_error': True, 'exception': True, 'message': str(e)}
+            if attempts > max_retries or not is_retryable(result):
+                return result, attempts
+            time.sleep(retry_delay * (2 ** (attempts - 1)) * (0.5 + random.random() / 2))
+
+    jobs = iter(jobs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(call, job): job for job in islice(jobs, max_workers * 2)}
+        while pending:
+            for future in wait(pending, return_when=FIRST_COMPLETED)[0]:
+                job = pending.pop(future)
+                result, attempts = future.result()
+                yield job, result, attempts
+                for next_job in islice(jobs, 1):
+                    pending[executor.submit(call, next_job)] = next_job
+
+
+class Checkpoint:
+    """ Small JSON state file written atomically, used to resume interrupted bulk jobs
+    """
+
+    def __init__(self, path):
+        """ Checkpoint constructor
+
+        @param path: string path to checkpoint file, checkpointing is disabled if empty
+        """
+        self.path = path
+
+    def load(self):
+        """ Read saved state
+
+        @return: dictionary with saved state, empty if there is nothing saved
+        """
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            logger.warning("Can't read checkpoint file '{}', start from the beginning.".format(self.path))
+            return {}
+
+    def save(self, state):
+        """ Replace saved state, file is never left half written
+
+        @param state: dictionary JSON serializable state
+        """
+        if not self.path:
+            return
+        tmp_path = "{}.tmp".format(self.path)
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """ Remove saved state after job is finished
+        """
+        if self.path and os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+class PagedExporter(abc.ABC):
+    """ Parallel export of limit/offset list endpoint
+
+    Total amount of records is taken from count(), offset ranges are fetched by a bounded thread pool
+    and records are streamed page by page. Subclasses implement count() and fetch_page(), and may override checkpoint_id().
+    """
+    MAX_PAGE_SIZE = 100
+
+    def __init__(self, client, page_size=MAX_PAGE_SIZE, max_workers=4, rate_limit=None, checkpoint_path=None):
+        """ Exporter constructor
+
+        @param client: PySendPulse object
+        @param page_size: unsigned int records per request. The max value is 100
+        @param max_workers: unsigned int max number of pages fetched at the same time
+        @param rate_limit: float max page requests per second, not limited if not set
+        @param checkpoint_path: string file to save progress to, export is resumed from it after restart
+        """
+        self.client = client
+        self.page_size = min(page_size or self.MAX_PAGE_SIZE, self.MAX_PAGE_SIZE)
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.checkpoint = Checkpoint(checkpoint_path)
+
+    def __iter__(self):
+        return self.export()
+
+    def checkpoint_id(self):
+        """ Values identifying exported list in checkpoint, progress of other lists is not resumed
+
+        @return: dictionary
+        """
+        return {}
+
+    @abc.abstractmethod
+    def count(self):
+        """ Get amount of records
+
+        @return: unsigned int
+        @raise: Exception amount is not available
+        """
+
+    @abc.abstractmethod
+    def fetch_page(self, limit, offset):
+        """ Get one page of records
+
+        @param limit: unsigned int max records
+        @param offset: unsigned int how many records pass before selection
+        @return: list of records
+        @raise: Exception API returned error
+        """
+
+    def __fetch_page(self, offset):
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        return self.fetch_page(self.page_size, offset)
+
+    def __resume_offset(self):
+        state = self.checkpoint.load()
+        if any(state.get(key) != value for key, value in self.checkpoint_id().items()):
+            return 0
+        return state.get('offset', 0)
+
+    def __save_progress(self, offset, before_save=None):
+        if before_save is not None and self.checkpoint.path:
+            before_save()
+        state = self.checkpoint_id()
+        state['offset'] = offset
+        self.checkpoint.save(state)
+
+    def export(self, ordered=True, before_save=None):
+        """ Stream all records
+
+        Progress is saved after every page, when all pages before it are done.
+        Unordered export may repeat records of already streamed later pages after resume.
+
+        @param ordered: boolean keep records in list order or yield pages as soon as they are fetched
+        @param before_save: callable called before progress is saved, e.g. to flush records written to file
+        @return: generator of records
+        """
+        start = self.__resume_offset()
+        total = self.count()
+        offsets = iter(range(start, total, self.page_size))
+        window = self.max_workers * 2
+        watermark = start
+        done = set()
+        last_page_full = False
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            for offset in offsets:
+                pending[executor.submit(self.__fetch_page, offset)] = offset
+                if len(pending) >= window:
+                    break
+            while pending:
+                if ordered:
+                    future = min(pending, key=pending.get)
+                    future.result()
+                    finished = [future]
+                else:
+                    finished = wait(pending, return_when=FIRST_COMPLETED)[0]
+                for future in finished:
+                    offset = pending.pop(future)
+                    page = future.result()
+                    for record in page:
+                        yield record
+                    done.add(offset)
+                    if offset + self.page_size >= total:
+                        last_page_full = len(page) >= self.page_size
+                    next_offset = next(offsets, None)
+                    if next_offset is not None:
+                        pending[executor.submit(self.__fetch_page, next_offset)] = next_offset
+                while watermark in done:
+                    done.remove(watermark)
+                    watermark += self.page_size
+                self.__save_progress(watermark, before_save)
+
+        # list could grow during export, fetch the rest one page at a time
+        while last_page_full:
+            page = self.__fetch_page(watermark)
+            for record in page:
+                yield record
+            watermark += self.page_size
+            self.__save_progress(watermark, before_save)
+            last_page_full = len(page) >= self.page_size
+        self.checkpoint.clear()
+
+    def export_to(self, callback, ordered=True, before_save=None):
+        """ Pass all records to callback
+
+        @param callback: callable taking one record
+        @param ordered: boolean keep records in list order
+        @param before_save: callable called before progress is saved, e.g. to flush records written by callback
+        @return: unsigned int amount of exported records
+        """
+        exported = 0
+        for record in self.export(ordered, before_save):
+            callback(record)
+            exported += 1
+        return exported
+
+    def export_to_jsonl(self, path, ordered=True):
+        """ Write all records to JSON Lines file, one record per line
+
+        File is appended to when export is resumed from checkpoint, it is flushed to disk before progress is saved.
+
+        @param path: string file path or text file-like object
+        @param ordered: boolean keep records in list order
+        @return: unsigned int amount of exported records
+        """
+        if not isinstance(path, str):
+            return self.export_to(lambda record: path.write(json.dumps(record) + '\n'), ordered, lambda: self.__flush(path))
+        with open(path, 'a' if self.__resume_offset() else 'w') as f:
+            return self.export_to(lambda record: f.write(json.dumps(record) + '\n'), ordered, lambda: self.__flush(f))
+
+    def export_to_csv(self, path, fields=None, ordered=True):
+        """ Write all records to CSV file, nested values are written as JSON
+
+        File is appended to without header when export is resumed from checkpoint,
+        it is flushed to disk before progress is saved.
+
+        @param path: string file path or text file-like object
+        @param fields: list of columns, keys of the first record by default
+        @param ordered: boolean keep records in list order
+        @return: unsigned int amount of exported records
+        """
+        if not isinstance(path, str):
+            return self.__export_to_csv(path, fields, ordered, True)
+        resumed = bool(self.__resume_offset())
+        with open(path, 'a' if resumed else 'w', newline='') as f:
+            return self.__export_to_csv(f, fields, ordered, not resumed)
+
+    @staticmethod
+    def __flush(f):
+        # records must reach the disk before checkpoint says they are exported
+        f.flush()
+        try:
+            os.fsync(f.fileno())
+        except (AttributeError, OSError, ValueError):
+            pass
+
+    def __export_to_csv(self, f, fields, ordered, write_header):
+        writer = None
+        exported = 0
+        for record in self.export(ordered, lambda: self.__flush(f)):
+            if writer is None:
+                writer = csv.DictWriter(f, fields or list(record), extrasaction='ignore')
+                if write_header:
+                    writer.writeheader()
+            writer.writerow(dict((key, json.dumps(value) if isinstance(value, (dict, list)) else value)
+                                 for key, value in record.items()))
+            exported += 1
+        return exported
+
+
+class AddressbookExporter(PagedExporter):
+    """ Parallel export of all emails from addressbook
+
+    Total amount of emails is taken from get_addressbook_info, offset ranges are fetched
+    by a bounded thread pool and emails are streamed page by page.
+    """
+
+    def __init__(self, client, addressbook_id, page_size=PagedExporter.MAX_PAGE_SIZE, max_workers=4, rate_limit=None,
+                 checkpoint_path=None):
+        """ Exporter constructor
+
+        @param client: PySendPulse object
+        @param addressbook_id: unsigned int addressbook ID
+        @param page_size: unsigned int emails per request. The max value is 100
+        @param max_workers: unsigned int max number of pages fetched at the same time
+        @param rate_limit: float max page requests per second, not limited if not set
+        @param checkpoint_path: string file to save progress to, export is resumed from it after restart
+        """
+        super().__init__(client, page_size, max_workers, rate_limit, checkpoint_path)
+        self.addressbook_id = addressbook_id
+
+    def checkpoint_id(self):
+        return {'addressbook_id': self.addressbook_id}
+
+    def count(self):
+        """ Get amount of emails in addressbook
+
+        @return: unsigned int
+        @raise: Exception addressbook info is not available
+        """
+        info = self.client.get_addressbook_info(self.addressbook_id)
+        if isinstance(info, list) and info:
+            info = info[0]
+        if not isinstance(info, dict) or 'all_email_qty' not in info:
+            raise Exception("Could not get amount of emails in addressbook {}: {}".format(self.addressbook_id, info))
+        return int(info['all_email_qty'])
+
+    def fetch_page(self, limit, offset):
+        page = self.client.get_emails_from_addressbook(self.addressbook_id, limit, offset)
+        if not isinstance(page, list):
+            raise Exception("Could not get emails of addressbook {} from offset {}: {}".format(self.addressbook_id, offset, page))
+        return page
+
+    def export(self, ordered=True, before_save=None):
+        """ Stream all emails of addressbook
+
+        Progress is saved after every page, when all pages before it are done.
+        Unordered export may repeat emails of already streamed later pages after resume.
+
+        @param ordered: boolean keep emails in addressbook order or yield pages as soon as they are fetched
+        @param before_save: callable called before progress is saved, e.g. to flush records written to file
+        @return: generator of email dictionaries
+        """
+        logger.info("Export addressbook {}".format(self.addressbook_id, ))
+        return super().export(ordered, before_save)
+
+
+class AddressbookImporter:
+    """ Bulk import of emails into addressbook
+
+    Emails are taken from any iterable, split into batches by amount and by request size
+    and uploaded with add_emails_to_addressbook by a bounded thread pool.
+    """
+    DEFAULT_BATCH_SIZE = 1000
+    DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+
+    def __init__(self, client, addressbook_id, batch_size=DEFAULT_BATCH_SIZE, max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+                 max_workers=4, max_retries=3, retry_delay=1.0, rate_limit=None):
+        """ Importer constructor
+
+        @param client: PySendPulse object
+        @param addressbook_id: unsigned int addressbook ID
+        @param batch_size: unsigned int max emails in one request
+        @param max_batch_bytes: unsigned int max size of emails JSON in one request
+        @param max_workers: unsigned int max number of requests running at the same time
+        @param max_retries: unsigned int how many times batch is repeated after server error or connection failure
+        @param retry_delay: float seconds before first retry, doubled on every next one
+        @param rate_limit: float max requests per second, not limited if not set
+        """
+        self.client = client
+        self.addressbook_id = addressbook_id
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+
+    def import_emails(self, emails):
+        """ Upload all emails
+
+        @param emails: iterable of dictionaries {'email': 'test@test.com', 'variables': {...}}, generators are read lazily
+        @return: dictionary with report {'total': int, 'succeeded': int, 'failed': int, 'batches': [
+                {'batch': 0, 'offset': 0, 'count': 1000, 'attempts': 1, 'is_error': False, 'result': {...}},
+                {...}
+            ]}
+        """
+        logger.info("Import emails into addressbook {}".format(self.addressbook_id, ))
+        jobs = iter_numbered_batches(emails, self.batch_size, self.max_batch_bytes, double_encoded_size)
+        report = {'total': 0, 'succeeded': 0, 'failed': 0, 'batches': []}
+        results = run_concurrently(lambda job: self.client.add_emails_to_addressbook(self.addressbook_id, job[2]), jobs,
+                                   self.max_workers, self.rate_limiter, self.max_retries, self.retry_delay)
+        for (number, offset, batch), result, attempts in results:
+            failed = is_error(result)
+            report['total'] += len(batch)
+            report['failed' if failed else 'succeeded'] += len(batch)
+            report['batches'].append({
+                'batch': number,
+                'offset': offset,
+                'count': len(batch),
+                'attempts': attempts,
+                'is_error': failed,
+                'result': result
+            })
+            if failed:
+                logger.warning("Batch {} from offset {} failed: {}".format(number, offset, result))
+        report['batches'].sort(key=lambda batch_report: batch_report['batch'])
+        return report
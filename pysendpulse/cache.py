@@ -0,0 +1,214 @@
+# -*- encoding:utf8 -*-
+
+""" Response cache for read-mostly SendPulse REST API endpoints
+"""
+
+import re
+import time
+import logging
+import threading
+from hashlib import md5
+from collections import OrderedDict
+
+import memcache
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """ Response restored from cache with the subset of requests.Response interface used by the wrapper
+
+    Body is kept as text and parsed on every json() call, so callers never share mutable results.
+    """
+
+    def __init__(self, status_code, url, text):
+        self.status_code = status_code
+        self.url = str(url)
+        self.text = text
+        self.headers = {}
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class ResponseCache:
+    """ TTL cache of GET responses with in-process LRU and optional Memcached tiers
+
+    Only paths matching ttls patterns are cached, '*' in pattern matches one path segment.
+    Cached paths are grouped by their first two segments, e.g. 'addressbooks/5'. Any POST, PUT or DELETE request
+    drops cached responses of the groups of its first one and two segments: editing 'addressbooks/5' drops
+    'addressbooks/5/variables' and 'addressbooks', adding sender to 'senders' drops 'senders'.
+    Groups are dropped by increasing their generation, with Memcached generations are shared by all processes.
+    Keys and generations include account passed by the client, so API accounts sharing one cache never read
+    responses of each other.
+    Key with the current generation is taken by get_key() before the request is sent and the response is stored
+    under it, so response of request which was running while the group was dropped is never read.
+    """
+    DEFAULT_TTLS = {
+        'addressbooks/*/variables': 300,
+        'senders': 300,
+        'smtp/domains': 300,
+        'smtp/ips': 3600,
+        'push/websites': 300,
+        'push/websites/*/variables': 300,
+        'balance': 60,
+        'balance/*': 60,
+    }
+    DEFAULT_MAX_ENTRIES = 1000
+
+    def __init__(self, ttls=None, max_entries=DEFAULT_MAX_ENTRIES, memcached_host=None, memcached_client=None,
+                 key_prefix="pysendpulse:cache"):
+        """ Response cache constructor
+
+        @param ttls: dictionary {path pattern: seconds} merged over DEFAULT_TTLS, 0 disables caching of the path
+        @param max_entries: unsigned int max responses kept in process, least recently used are dropped
+        @param memcached_host: string Host for Memcached server to share cache between processes
+        @param memcached_client: memcache.Client object to share cache between processes
+        @param key_prefix: string prefix of Memcached keys
+        """
+        patterns = dict(self.DEFAULT_TTLS)
+        patterns.update(ttls or {})
+        self.__ttls = [(re.compile('^{}$'.format(re.escape(pattern).replace('\\*', '[^/]+'))), ttl)
+                       for pattern, ttl in patterns.items() if ttl]
+        self.max_entries = max(1, max_entries)
+        if memcached_host and memcached_client is None:
+            memcached_client = memcache.Client([memcached_host])
+        self.__memcached = memcached_client
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__generations = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def shared(self):
+        """ Cache is shared through Memcached
+        """
+        return self.__memcached is not None
+
+    @staticmethod
+    def __normalize(path):
+        return path.strip('/')
+
+    @staticmethod
+    def __group(path, segments=2):
+        return '/'.join(path.split('/')[:segments])
+
+    def get_ttl(self, path):
+        """ Get cache TTL of path
+
+        @param path: string API path
+        @return: float seconds, 0 if path is not cached
+        """
+        path = self.__normalize(path)
+        for pattern, ttl in self.__ttls:
+            if pattern.match(path):
+                return ttl
+        return 0
+
+    def __generation(self, group):
+        if self.__memcached is None:
+            return self.__generations.get(group, 0)
+        return int(self.__memcached.get("{}:generation:{}".format(self.key_prefix, group)) or 0)
+
+    def get_key(self, path, params=None, account=''):
+        """ Get cache key of request with the current generation of its group, take it before request is sent
+
+        @param path: string API path
+        @param params: dictionary or serialized request params
+        @param account: string account hash, e.g. token hash name of the client
+        @return: string key or None if path is not cached
+        """
+        path = self.__normalize(path)
+        if not self.get_ttl(path):
+            return None
+        if isinstance(params, str):
+            params = json.loads(params)
+        params = json.dumps(params, sort_keys=True)
+        generation = self.__generation("{}:{}".format(account, self.__group(path)))
+        digest = md5("{}:{}?{}".format(account, path, params).encode('utf-8')).hexdigest()
+        return "{}:{}:{}".format(self.key_prefix, generation, digest)
+
+    def get(self, key):
+        """ Get cached response
+
+        @param key: string key returned by get_key()
+        @return: CachedResponse object or None if there is no fresh response
+        """
+        if key is None:
+            return None
+        now = time.time()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return CachedResponse(*entry[1])
+        if self.__memcached is not None:
+            value = self.__memcached.get(key)
+            if value is not None:
+                expires_at, response = json.loads(value)
+                self.__store(key, expires_at, response)
+                with self.__lock:
+                    self.hits += 1
+                return CachedResponse(*response)
+        with self.__lock:
+            self.misses += 1
+        return None
+
+    def __store(self, key, expires_at, response):
+        with self.__lock:
+            self.__entries[key] = (expires_at, response)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def set(self, key, path, response):
+        """ Cache successful response
+
+        @param key: string key returned by get_key() before the request was sent
+        @param path: string API path
+        @param response: response object with status_code, url and text
+        """
+        ttl = self.get_ttl(path)
+        if key is None or not ttl or not response.ok:
+            return
+        expires_at = time.time() + ttl
+        value = [response.status_code, str(response.url), response.text]
+        self.__store(key, expires_at, value)
+        if self.__memcached is not None:
+            self.__memcached.set(key, json.dumps([expires_at, value]), int(ttl) + 1)
+
+    def invalidate(self, path, account=''):
+        """ Drop cached responses which may be changed by request to path
+
+        @param path: string API path of POST, PUT or DELETE request
+        @param account: string account hash, e.g. token hash name of the client
+        """
+        path = self.__normalize(path)
+        for group in {self.__group(path, 1), self.__group(path, 2)}:
+            logger.debug("Invalidate cached responses of '{}'".format(group, ))
+            group = "{}:{}".format(account, group)
+            if self.__memcached is None:
+                with self.__lock:
+                    self.__generations[group] = self.__generations.get(group, 0) + 1
+                continue
+            key = "{}:generation:{}".format(self.key_prefix, group)
+            if self.__memcached.incr(key) is None and not self.__memcached.add(key, 1):
+                self.__memcached.incr(key)
+
+    def clear(self):
+        """ Drop all responses cached in process
+        """
+        with self.__lock:
+            self.__entries.clear()
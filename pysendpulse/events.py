@@ -0,0 +1,154 @@
+# -*- encoding:utf8 -*-
+
+""" Batched delivery of SendPulse automation events
+"""
+
+import time
+import logging
+import threading
+
+from pysendpulse.bulk import is_error, run_concurrently
+
+logger = logging.getLogger(__name__)
+
+
+class EventBatcher:
+    """ Buffer of events delivered with send_event in the background
+
+    Events are buffered per event name and flushed when a buffer reaches max_batch_size or every flush_interval
+    seconds. Events API takes one event per request, so a flush sends buffered events concurrently over pooled
+    connections of the client. When max_pending events are waiting, send_event blocks until they are flushed.
+    """
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_FLUSH_INTERVAL = 1.0
+
+    def __init__(self, client, max_batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL, max_workers=8,
+                 max_pending=10000, max_retries=0, on_error=None):
+        """ Event batcher constructor, background flusher is started immediately
+
+        @param client: PySendPulse object
+        @param max_batch_size: unsigned int buffered events of one name which trigger flush
+        @param flush_interval: float max seconds event waits in buffer
+        @param max_workers: unsigned int max requests running at the same time during flush
+        @param max_pending: unsigned int max buffered events of all names
+        @param max_retries: unsigned int how many times failed event is sent again after server error
+        @param on_error: callable (event_name, body, result) called for every event which was not delivered
+        """
+        self.client = client
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval = flush_interval
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_batch_size, max_pending)
+        self.max_retries = max_retries
+        self.on_error = on_error
+        self.__buffers = {}
+        self.__pending = 0
+        self.__metrics = {'queued': 0, 'sent': 0, 'failed': 0, 'flushes': 0, 'total_delay': 0.0}
+        self.__lock = threading.Lock()
+        self.__flushed = threading.Condition(self.__lock)
+        self.__flush_lock = threading.Lock()
+        self.__wake_up = threading.Event()
+        self.__closed = False
+        self.__flusher = threading.Thread(target=self.__flush_forever, name="pysendpulse-events")
+        self.__flusher.daemon = True
+        self.__flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def send_event(self, event_name, body):
+        """ Buffer event for delivery
+
+        @param event_name: string event name
+        @param body: dictionary event body {'email': 'test@test.com', 'phone': '+123456789', 'var_1': 'var_1_value'}
+        @raise: Exception batcher is closed or empty event name or body
+        """
+        if not event_name or not body:
+            raise Exception("Empty event name or body")
+        with self.__lock:
+            if self.__closed:
+                raise Exception("Event batcher is closed")
+            while self.__pending >= self.max_pending:
+                self.__wake_up.set()
+                self.__flushed.wait()
+            buffer = self.__buffers.setdefault(event_name, [])
+            buffer.append((body, time.time()))
+            self.__pending += 1
+            self.__metrics['queued'] += 1
+            if len(buffer) >= self.max_batch_size:
+                self.__wake_up.set()
+
+    @property
+    def metrics(self):
+        """ Delivery metrics
+
+        @return: dictionary {'queued': int, 'sent': int, 'failed': int, 'pending': int, 'flushes': int, 'avg_delay': float}
+            where avg_delay is average seconds from send_event call to delivery
+        """
+        with self.__lock:
+            metrics = dict(self.__metrics)
+            metrics['pending'] = self.__pending
+        done = metrics['sent'] + metrics['failed']
+        metrics['avg_delay'] = metrics.pop('total_delay') / done if done else 0.0
+        return metrics
+
+    def flush(self):
+        """ Deliver all buffered events and wait for it
+
+        @return: unsigned int amount of delivered events
+        """
+        with self.__flush_lock:
+            with self.__lock:
+                buffers, self.__buffers = self.__buffers, {}
+            if not buffers:
+                return 0
+            jobs = ((event_name, body, queued_at) for event_name, events in buffers.items() for body, queued_at in events)
+            sent = failed = 0
+            total_delay = 0.0
+            results = run_concurrently(lambda job: self.client.send_event(job[0], job[1]), jobs, self.max_workers,
+                                       max_retries=self.max_retries)
+            for (event_name, body, queued_at), result, _ in results:
+                total_delay += time.time() - queued_at
+                if is_error(result):
+                    failed += 1
+                    logger.warning("Event '{}' was not delivered: {}".format(event_name, result))
+                    if self.on_error:
+                        try:
+                            self.on_error(event_name, body, result)
+                        except Exception as e:
+                            logger.error("Event error callback failed: {}".format(e, ))
+                else:
+                    sent += 1
+            with self.__lock:
+                self.__pending -= sent + failed
+                self.__metrics['sent'] += sent
+                self.__metrics['failed'] += failed
+                self.__metrics['flushes'] += 1
+                self.__metrics['total_delay'] += total_delay
+                self.__flushed.notify_all()
+            return sent
+
+    def __flush_forever(self):
+        while True:
+            self.__wake_up.wait(self.flush_interval)
+            self.__wake_up.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Events flush failed: {}".format(e, ))
+            with self.__lock:
+                if self.__closed and not self.__buffers:
+                    return
+
+    def close(self, timeout=None):
+        """ Stop accepting events, deliver buffered ones and stop background flusher
+
+        @param timeout: float max seconds to wait for delivery
+        """
+        with self.__lock:
+            self.__closed = True
+        self.__wake_up.set()
+        self.__flusher.join(timeout)
@@ -0,0 +1,213 @@
+# -*- encoding:utf8 -*-
+
+""" Durable local outbox for SendPulse API calls
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+
+from pysendpulse.bulk import is_error, is_retryable, run_concurrently
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """ Write-ahead outbox for send_event and smtp_send_mail kept in SQLite
+
+    Calls are saved to local database and return at once, background drainer delivers them in batches
+    and marks them done. Messages not delivered before restart are delivered after it, so delivery is
+    at-least-once: a message may be sent twice if process stops right after sending it.
+    """
+    KIND_EVENT = 'event'
+    KIND_SMTP = 'smtp'
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    def __init__(self, client, path, batch_size=100, max_workers=4, poll_interval=1.0, max_attempts=5, retry_delay=5.0,
+                 keep_done=3600, autostart=True):
+        """ Outbox constructor
+
+        @param client: PySendPulse object
+        @param path: string path to SQLite database file
+        @param batch_size: unsigned int max messages taken from database at once
+        @param max_workers: unsigned int max messages sent at the same time
+        @param poll_interval: float seconds between checks for new messages when outbox is empty
+        @param max_attempts: unsigned int attempts before message is marked failed
+        @param retry_delay: float seconds before first redelivery, doubled on every next one
+        @param keep_done: float seconds delivered messages are kept in database
+        @param autostart: boolean start background drainer in constructor
+        """
+        self.client = client
+        self.path = path
+        self.batch_size = batch_size
+        self.max_workers = max(1, max_workers)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.keep_done = keep_done
+        self.__lock = threading.Lock()
+        self.__drain_lock = threading.Lock()
+        self.__wake_up = threading.Event()
+        self.__stopped = threading.Event()
+        self.__drainer = None
+        self.__db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute("PRAGMA synchronous=NORMAL")
+        self.__db.execute("""CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            last_error TEXT
+        )""")
+        self.__db.execute("CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, next_attempt_at)")
+        if autostart:
+            self.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __append(self, kind, payload):
+        now = time.time()
+        with self.__lock:
+            cursor = self.__db.execute("INSERT INTO outbox (kind, payload, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                                       (kind, json.dumps(payload), now, now))
+        self.__wake_up.set()
+        return cursor.lastrowid
+
+    def send_event(self, event_name, body):
+        """ Save event for delivery with client.send_event
+
+        @param event_name: string event name
+        @param body: dictionary event body
+        @return: unsigned int outbox message id
+        """
+        return self.__append(self.KIND_EVENT, {'event_name': event_name, 'body': body})
+
+    def smtp_send_mail(self, email):
+        """ Save email for delivery with client.smtp_send_mail
+
+        @param email: dictionary email, same as for smtp_send_mail
+        @return: unsigned int outbox message id
+        """
+        return self.__append(self.KIND_SMTP, {'email': email})
+
+    def count(self, status=STATUS_PENDING):
+        """ Amount of messages with status
+
+        @param status: string pending|done|failed
+        @return: unsigned int
+        """
+        with self.__lock:
+            return self.__db.execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (status,)).fetchone()[0]
+
+    def __deliver(self, message):
+        kind, payload = message[1], json.loads(message[2])
+        if kind == self.KIND_EVENT:
+            return self.client.send_event(payload['event_name'], payload['body'])
+        return self.client.smtp_send_mail(payload['email'])
+
+    def drain(self):
+        """ Deliver one batch of due messages
+
+        @return: unsigned int amount of processed messages
+        """
+        with self.__drain_lock:
+            return self.__drain()
+
+    def __drain(self):
+        with self.__lock:
+            messages = self.__db.execute(
+                "SELECT id, kind, payload, attempts FROM outbox WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (self.STATUS_PENDING, time.time(), self.batch_size)).fetchall()
+        if not messages:
+            return 0
+        updates = []
+        for message, result, _ in run_concurrently(self.__deliver, messages, self.max_workers):
+            now = time.time()
+            attempts = message[3] + 1
+            if not is_error(result):
+                updates.append((self.STATUS_DONE, attempts, 0, now, None, message[0]))
+            elif is_retryable(result) and attempts < self.max_attempts:
+                updates.append((self.STATUS_PENDING, attempts, now + self.retry_delay * (2 ** (attempts - 1)), now,
+                                json.dumps(result), message[0]))
+            else:
+                logger.error("Outbox message {} failed: {}".format(message[0], result))
+                updates.append((self.STATUS_FAILED, attempts, 0, now, json.dumps(result), message[0]))
+        with self.__lock:
+            try:
+                self.__db.execute("BEGIN")
+                self.__db.executemany(
+                    "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, updated_at = ?, last_error = ? WHERE id = ?",
+                    updates)
+                self.__db.execute("COMMIT")
+            except Exception:
+                # open transaction would make every next BEGIN fail, messages stay pending and are delivered again
+                if self.__db.in_transaction:
+                    self.__db.execute("ROLLBACK")
+                raise
+        return len(messages)
+
+    def purge(self, older_than=0):
+        """ Remove delivered messages from database
+
+        @param older_than: float seconds, only messages delivered earlier are removed
+        @return: unsigned int amount of removed messages
+        """
+        with self.__lock:
+            return self.__db.execute("DELETE FROM outbox WHERE status = ? AND updated_at <= ?",
+                                     (self.STATUS_DONE, time.time() - older_than)).rowcount
+
+    def start(self):
+        """ Start background drainer
+        """
+        if self.__drainer is not None and self.__drainer.is_alive():
+            return
+        self.__stopped.clear()
+        self.__drainer = threading.Thread(target=self.__drain_forever, name="pysendpulse-outbox")
+        self.__drainer.daemon = True
+        self.__drainer.start()
+
+    def __drain_forever(self):
+        while not self.__stopped.is_set():
+            try:
+                processed = self.drain()
+                self.purge(self.keep_done)
+            except Exception as e:
+                logger.error("Outbox drain failed: {}".format(e, ))
+                processed = 0
+            if not processed:
+                self.__wake_up.wait(self.poll_interval)
+                self.__wake_up.clear()
+
+    def close(self, flush=True, timeout=None):
+        """ Stop background drainer and close database
+
+        @param flush: boolean deliver all due messages before closing
+        @param timeout: float max seconds to wait for drainer
+        """
+        self.__stopped.set()
+        self.__wake_up.set()
+        if self.__drainer is not None:
+            self.__drainer.join(timeout)
+            self.__drainer = None
+        if flush:
+            while self.drain():
+                pass
+        with self.__lock:
+            self.__db.close()
@@ -0,0 +1,210 @@
+# -*- encoding:utf8 -*-
+
+""" Bulk helpers for SendPulse web push API
+"""
+
+import time
+import logging
+import threading
+from itertools import islice
+
+from pysendpulse.bulk import Checkpoint, PagedExporter, is_error, run_concurrently
+from pysendpulse.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class PushFanOut:
+    """ Sending of one push message to many websites
+
+    Tasks are created with push_create by a bounded thread pool, every website may get its own filter.
+    List of websites is read with push_iter_websites and kept in memory for websites_ttl seconds.
+    """
+    DEFAULT_WEBSITES_TTL = 300
+
+    def __init__(self, client, max_workers=8, rate_limit=None, max_retries=0, retry_delay=1.0, websites_ttl=DEFAULT_WEBSITES_TTL):
+        """ Fan-out constructor
+
+        @param client: PySendPulse object
+        @param max_workers: unsigned int max number of tasks created at the same time
+        @param rate_limit: float max requests per second, not limited if not set
+        @param max_retries: unsigned int how many times task is created again after server error, may cause duplicates
+        @param retry_delay: float seconds before first retry, doubled on every next one
+        @param websites_ttl: float seconds list of websites is cached
+        """
+        self.client = client
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.websites_ttl = websites_ttl
+        self.__websites = None
+        self.__websites_expire_at = 0
+        self.__lock = threading.Lock()
+
+    def get_websites(self, refresh=False):
+        """ Get all websites of the account
+
+        @param refresh: boolean read list from API even if cached one is not expired
+        @return: list of website dictionaries
+        @raise: Exception API returned error
+        """
+        with self.__lock:
+            if refresh or self.__websites is None or time.time() >= self.__websites_expire_at:
+                self.__websites = list(self.client.push_iter_websites())
+                self.__websites_expire_at = time.time() + self.websites_ttl
+                logger.info("Loaded {} push websites".format(len(self.__websites), ))
+            return self.__websites
+
+    def send(self, title, body, ttl, websites=None, filters=None, additional_params=None):
+        """ Create push task for every website
+
+        @param title: string push title
+        @param body: string push body
+        @param ttl: unsigned int ttl for push messages
+        @param websites: iterable of website ids, all websites of the account if not set
+        @param filters: dictionary {website_id: {additional params for this website, e.g. 'filter'}}
+        @param additional_params: dictionary additional params for all push tasks
+        @return: generator of (website_id, task_id, result) tuples in completion order, task_id is None on error
+        """
+        if websites is None:
+            websites = [website['id'] for website in self.get_websites()]
+        filters = filters or {}
+
+        def create(website_id):
+            params = dict(additional_params or {})
+            params.update(filters.get(website_id) or {})
+            return self.client.push_create(title, website_id, body, ttl, params)
+
+        logger.info("Push fan-out '{}'".format(title, ))
+        results = run_concurrently(create, websites, self.max_workers, self.rate_limiter, self.max_retries, self.retry_delay)
+        for website_id, result, _ in results:
+            if is_error(result):
+                logger.warning("Push task for website {} failed: {}".format(website_id, result))
+                yield website_id, None, result
+            else:
+                yield website_id, result.get('id') if isinstance(result, dict) else None, result
+
+
+class SubscriptionStateUpdater:
+    """ Bulk change of push subscriptions state
+
+    Subscription ids are taken from any iterable and updated with push_set_subscription_state by a bounded
+    thread pool. Progress is saved to checkpoint file as amount of ids from the beginning which are all done,
+    so after restart the same ids in the same order are resumed where they stopped.
+    """
+    DEFAULT_CHECKPOINT_EVERY = 1000
+
+    def __init__(self, client, max_workers=8, max_retries=3, retry_delay=1.0, rate_limit=None, checkpoint_path=None,
+                 checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+        """ Updater constructor
+
+        @param client: PySendPulse object
+        @param max_workers: unsigned int max number of requests running at the same time
+        @param max_retries: unsigned int how many times update is repeated after server error or connection failure
+        @param retry_delay: float seconds before first retry, doubled on every next one
+        @param rate_limit: float max requests per second, not limited if not set
+        @param checkpoint_path: string file to save progress to, update is resumed from it after restart
+        @param checkpoint_every: unsigned int save progress after this amount of updates
+        """
+        self.client = client
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.checkpoint_every = max(1, checkpoint_every)
+
+    def set_state(self, subscription_ids, state_value):
+        """ Set state of all subscriptions
+
+        @param subscription_ids: iterable of subscription ids, generators are read lazily
+        @param state_value: unsigned int state value. Can be 0 or 1
+        @return: dictionary with report {'total': int, 'succeeded': int, 'failed': int, 'skipped': int,
+                'elapsed': float seconds, 'rate': float updates per second,
+                'failures': [{'id': 1, 'attempts': 4, 'result': {...}}, {...}]
+            }
+        """
+        logger.info("Set state {} of push subscriptions".format(state_value, ))
+        state = self.checkpoint.load()
+        skipped = state.get('position', 0) if state.get('state') == state_value else 0
+        jobs = enumerate(islice(subscription_ids, skipped, None), skipped)
+        report = {'total': 0, 'succeeded': 0, 'failed': 0, 'skipped': skipped, 'elapsed': 0.0, 'rate': 0.0, 'failures': []}
+        started_at = time.time()
+        watermark = skipped
+        done = set()
+        saved_at = watermark
+        results = run_concurrently(lambda job: self.client.push_set_subscription_state(job[1], state_value), jobs,
+                                   self.max_workers, self.rate_limiter, self.max_retries, self.retry_delay)
+        for (position, subscription_id), result, attempts in results:
+            report['total'] += 1
+            if is_error(result):
+                report['failed'] += 1
+                report['failures'].append({'id': subscription_id, 'attempts': attempts, 'result': result})
+                logger.warning("State of push subscription {} was not changed: {}".format(subscription_id, result))
+            else:
+                report['succeeded'] += 1
+            done.add(position)
+            while watermark in done:
+                done.remove(watermark)
+                watermark += 1
+            if watermark - saved_at >= self.checkpoint_every:
+                self.checkpoint.save({'state': state_value, 'position': watermark})
+                saved_at = watermark
+                logger.info("Push subscriptions updated: {}, failed: {}".format(report['succeeded'], report['failed']))
+        self.checkpoint.clear()
+        report['elapsed'] = time.time() - started_at
+        report['rate'] = report['total'] / report['elapsed'] if report['elapsed'] else 0.0
+        return report
+
+
+class SubscriptionExporter(PagedExporter):
+    """ Parallel export of all push subscriptions of website
+
+    Total amount is taken from push_count_subscriptions, offset ranges are fetched by a bounded thread pool
+    and subscriptions are streamed page by page, to a generator, callback, JSON Lines or CSV file.
+    """
+
+    def __init__(self, client, website_id, page_size=PagedExporter.MAX_PAGE_SIZE, max_workers=4, rate_limit=None,
+                 checkpoint_path=None):
+        """ Exporter constructor
+
+        @param client: PySendPulse object
+        @param website_id: unsigned int website id
+        @param page_size: unsigned int subscriptions per request. The max value is 100
+        @param max_workers: unsigned int max number of pages fetched at the same time
+        @param rate_limit: float max page requests per second, not limited if not set
+        @param checkpoint_path: string file to save progress to, export is resumed from it after restart
+        """
+        super().__init__(client, page_size, max_workers, rate_limit, checkpoint_path)
+        self.website_id = website_id
+
+    def checkpoint_id(self):
+        return {'website_id': self.website_id}
+
+    def count(self):
+        """ Get amount of subscriptions of website
+
+        @return: unsigned int
+        @raise: Exception amount is not available
+        """
+        result = self.client.push_count_subscriptions(self.website_id)
+        if not isinstance(result, dict) or 'total' not in result:
+            raise Exception("Could not get amount of subscriptions of website {}: {}".format(self.website_id, result))
+        return int(result['total'])
+
+    def fetch_page(self, limit, offset):
+        page = self.client.push_get_subscriptions(self.website_id, limit, offset)
+        if not isinstance(page, list):
+            raise Exception("Could not get subscriptions of website {} from offset {}: {}".format(self.website_id, offset, page))
+        return page
+
+    def export(self, ordered=True, before_save=None):
+        """ Stream all subscriptions of website
+
+        @param ordered: boolean keep subscriptions in list order or yield pages as soon as they are fetched
+        @param before_save: callable called before progress is saved, e.g. to flush records written to file
+        @return: generator of subscription dictionaries
+        """
+        logger.info("Export push subscriptions of website {}".format(self.website_id, ))
+        return super().export(ordered, before_save)
@@ -6,14 +6,21 @@ Documentation:
     https://sendpulse.com/api
 """
 
-import os
-import memcache
 import requests
+from requests.adapters import HTTPAdapter
+import time
 import logging
 import base64
-from hashlib import md5
+from concurrent.futures import ThreadPoolExecutor
 from deprecated import deprecated
 
+from pysendpulse.token_manager import TokenManager
+from pysendpulse.retry import RetryPolicy
+from pysendpulse.attachments import JsonStream
+from pysendpulse.bulk import is_error
+from pysendpulse.suppression import SuppressionList
+from pysendpulse.single_flight import SingleFlight
+
 try:
     import simplejson as json
 except ImportError:
@@ -35,129 +42,168 @@ class PySendPulse:
     """ SendPulse REST API python wrapper
     """
     __api_url = "https://api.sendpulse.com"
-    __user_id = None
-    __secret = None
-    __token = None
-    __token_file_path = ""
-    __token_hash_name = None
-    __storage_type = "FILE"
-    __refresh_token = 0
-    __memcached_host = "127.0.0.1:11211"
-
-    MEMCACHED_VALUE_TIMEOUT = 3600
-    ALLOWED_STORAGE_TYPES = ['FILE', 'MEMCACHED']
-
-    def __init__(self, user_id, secret, storage_type="FILE", token_file_path="", memcached_host="127.0.0.1:11211"):
+    __token_manager = None
+    __session = None
+    __timeout = None
+    __retry_policy = None
+    __rate_limiter = None
+    __suppression_list = None
+    __response_cache = None
+    __single_flight = None
+
+    MEMCACHED_VALUE_TIMEOUT = TokenManager.MEMCACHED_VALUE_TIMEOUT
+    ALLOWED_STORAGE_TYPES = TokenManager.ALLOWED_STORAGE_TYPES
+    DEFAULT_POOL_CONNECTIONS = 10
+    DEFAULT_POOL_MAXSIZE = 10
+    MAX_PAGE_SIZE = 100
+
+    def __init__(self, user_id, secret, storage_type="FILE", token_file_path="", memcached_host="127.0.0.1:11211",
+                 pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE, keep_alive=True, timeout=None,
+                 token_manager=None, lazy=False, retry_policy=None, rate_limiter=None, suppression_list=None,
+                 response_cache=None, coalesce_requests=True, redis_url="redis://127.0.0.1:6379/0"):
         """ SendPulse API constructor
 
         @param user_id: string REST API ID from SendPulse settings
         @param secret: string REST API Secret from SendPulse settings
-        @param storage_type: string FILE|MEMCACHED
+        @param storage_type: string FILE|MEMCACHED|MEMORY|REDIS or TokenStorage object
         @param memcached_host: string Host for Memcached server, default is 127.0.0.1:11211
+        @param pool_connections: unsigned int number of per-host connection pools to keep
+        @param pool_maxsize: unsigned int max number of connections kept open per host
+        @param keep_alive: boolean reuse connections between requests or close them after every call
+        @param timeout: float|tuple default timeout in seconds for every request, (connect, read) tuple is accepted too
+        @param token_manager: TokenManager object shared with other clients, storage settings are ignored if it is set
+        @param lazy: boolean do not load token in constructor, it is loaded on the first request or by warm_up()
+        @param retry_policy: RetryPolicy object, by default idempotent requests are tried up to 3 times
+        @param rate_limiter: RateLimiter object, may be shared with other clients
+        @param suppression_list: SuppressionList object updated after successful blacklist and unsubscribe changes
+        @param response_cache: ResponseCache object for read-mostly GET endpoints, responses are not cached if not set
+        @param coalesce_requests: boolean identical GET requests running at the same time share one API call
+        @param redis_url: string Redis server url for REDIS storage
         @raise: Exception empty credentials or get token failed
         """
         logger.info("Initialization SendPulse REST API Class")
         if not user_id or not secret:
             raise Exception("Empty ID or SECRET")
 
-        self.__user_id = user_id
-        self.__secret = secret
-        self.__storage_type = storage_type.upper()
-        self.__token_file_path = token_file_path
-        self.__memcached_host = memcached_host
-        m = md5()
-        m.update("{}::{}".format(user_id, secret).encode('utf-8'))
-        self.__token_hash_name = m.hexdigest()
-        if self.__storage_type not in self.ALLOWED_STORAGE_TYPES:
-            logger.warning("Wrong storage type '{}'. Allowed storage types are: {}".format(storage_type, self.ALLOWED_STORAGE_TYPES))
-            logger.warning("Try to use 'FILE' instead.")
-            self.__storage_type = 'FILE'
-        logger.debug("Try to get security token from '{}'".format(self.__storage_type, ))
-        if self.__storage_type == "MEMCACHED":
-            mc = memcache.Client([self.__memcached_host])
-            self.__token = mc.get(self.__token_hash_name)
-        else:  # file
-            filepath = "{}{}".format(self.__token_file_path, self.__token_hash_name)
-            if os.path.isfile(filepath):
-                with open(filepath, 'rb') as f:
-                    self.__token = f.readline()
+        self.__session = self.__create_session(pool_connections, pool_maxsize, keep_alive)
+        self.__timeout = timeout
+        self.__retry_policy = retry_policy or RetryPolicy()
+        self.__rate_limiter = rate_limiter
+        self.__suppression_list = suppression_list
+        self.__response_cache = response_cache
+        self.__single_flight = SingleFlight() if coalesce_requests else None
+        self.__token_manager = token_manager or TokenManager(user_id, secret, storage_type, token_file_path, memcached_host,
+                                                             self.__api_url, self.__session, timeout, redis_url=redis_url)
+        if not lazy:
+            self.warm_up()
 
-            else:
-                logger.warning("Can't find file '{}' to read security token.".format(filepath))
-        logger.debug("Got: '{}'".format(self.__token, ))
-        if not self.__token and not self.__get_token():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def warm_up(self):
+        """ Load token from storage or get it from API server, connection to API server is opened if token is requested
+
+        @raise: Exception get token failed
+        """
+        if not self.__token_manager.get_token():
             raise Exception("Could not connect to API. Please, check your ID and SECRET")
 
-    def __get_token(self):
-        """ Get new token from API server and store it in storage
-        @return: boolean
+    def close(self):
+        """ Close all pooled connections of this client
         """
-        logger.debug("Try to get new token from server")
-        self.__refresh_token += 1
-        data = {
-            "grant_type": "client_credentials",
-            "client_id": self.__user_id,
-            "client_secret": self.__secret,
-        }
-        response = self.__send_request("oauth/access_token", "POST", data, False)
-        if response.status_code != 200:
-            return False
-        self.__refresh_token = 0
-        self.__token = response.json()['access_token']
-        logger.debug("Got: '{}'".format(self.__token, ))
-        if self.__storage_type == "MEMCACHED":
-            logger.debug("Try to set token '{}' into 'MEMCACHED'".format(self.__token, ))
-            mc = memcache.Client([self.__memcached_host])
-            mc.set(self.__token_hash_name, self.__token, self.MEMCACHED_VALUE_TIMEOUT)
-        else:
-            filepath = "{}{}".format(self.__token_file_path, self.__token_hash_name)
-            try:
-                if not os.path.isdir(self.__token_file_path):
-                    os.makedirs(self.__token_file_path, exist_ok=True)
-
-                with open(filepath, 'w') as f:
-                    f.write(self.__token)
-                    logger.debug("Set token '{}' into 'FILE' '{}'".format(self.__token, filepath))
-            except IOError:
-                logger.warning("Can't create 'FILE' to store security token. Please, check your settings.")
-        if self.__token:
-            return True
-        return False
-
-    def __send_request(self, path, method="GET", params=None, use_token=True, use_json_content_type=False):
+        logger.debug("Close SendPulse REST API connection pool")
+        if self.__session is not None:
+            self.__session.close()
+
+    @staticmethod
+    def __create_session(pool_connections, pool_maxsize, keep_alive):
+        """ Create HTTP session with keep-alive connection pool shared by all API calls
+
+        @param pool_connections: unsigned int number of per-host connection pools to keep
+        @param pool_maxsize: unsigned int max number of connections kept open per host
+        @param keep_alive: boolean reuse connections between requests or not
+        @return: requests.Session object
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def __send_request(self, path, method="GET", params=None, use_token=True, use_json_content_type=False, timeout=None, refresh_token=True, coalesce=True):
         """ Form and send request to API service
 
         @param path: sring what API url need to call
         @param method: HTTP method GET|POST|PUT|DELETE
-        @param params: dict argument need to send to server
+        @param params: dict argument need to send to server, string with already serialized JSON or JsonStream
         @param use_token: boolean need to use token or not
         @param use_json_content_type: boolean need to convert params data to json or not
+        @param timeout: float|tuple timeout for this request, client default is used if not set
+        @param refresh_token: boolean refresh token and repeat request once on 401 or not
+        @param coalesce: boolean share the call with identical GET requests running at the same time
         @return: HTTP requests library object http://www.python-requests.org/
         """
         url = "{}/{}".format(self.__api_url, path)
         method.upper()
         logger.debug("__send_request method: {} url: '{}' with parameters: {}".format(method, url, params))
-        if type(params) not in (dict, list):
+        if type(params) not in (dict, list, str, JsonStream):
             params = {}
-        if use_token and self.__token:
-            headers = {'Authorization': 'Bearer {}'.format(self.__token)}
+        if coalesce and self.__single_flight is not None and method == "GET":
+            key = (path, params if isinstance(params, str) else json.dumps(params, sort_keys=True), use_token, timeout)
+            return self.__single_flight.do(key, self.__send_request, path, method, params, use_token,
+                                         use_json_content_type, timeout, refresh_token, False)
+        cache_key = None
+        if self.__response_cache is not None and method == "GET":
+            cache_key = self.__response_cache.get_key(path, params, self.__token_manager.token_hash_name)
+            cached = self.__response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Cached response for {}".format(url, ))
+                return cached
+        token = self.__token_manager.get_token() if use_token else None
+        if token:
+            headers = {'Authorization': 'Bearer {}'.format(token)}
         else:
             headers = {}
         # if use_json_content_type and params:
         headers['Content-Type'] = 'application/json'
-        params = json.dumps(params)
-
-        if method == "POST":
-            response = requests.post(url, headers=headers, data=params)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, data=params)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers, data=params)
-        else:
-            response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 401 and self.__refresh_token == 0:
-            self.__get_token()
-            return self.__send_request(path, method, json.loads(params), use_token)
+        if not isinstance(params, (str, JsonStream)):
+            params = json.dumps(params)
+        if timeout is None:
+            timeout = self.__timeout
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.__rate_limiter:
+                self.__rate_limiter.acquire(path)
+            try:
+                response = self.__http_call(method, url, headers, params, timeout)
+            except Exception as e:
+                if not self.__retry_policy.should_retry(method, attempt, exception=e):
+                    raise
+                delay = self.__retry_policy.get_delay(attempt)
+                logger.warning("{} {} failed: {}. Retry in {:.2f}s".format(method, url, e, delay))
+                time.sleep(delay)
+                continue
+            if not self.__retry_policy.should_retry(method, attempt, status_code=response.status_code):
+                break
+            delay = self.__retry_policy.get_delay(attempt, response.headers.get('Retry-After'))
+            logger.warning("{} {} returned {}. Retry in {:.2f}s".format(method, url, response.status_code, delay))
+            time.sleep(delay)
+
+        if self.__response_cache is not None:
+            if method == "GET":
+                self.__response_cache.set(cache_key, path, response)
+            else:
+                self.__response_cache.invalidate(path, self.__token_manager.token_hash_name)
+        if response.status_code == 401 and use_token and refresh_token:
+            if self.__token_manager.refresh(token):
+                return self.__send_request(path, method, params, use_token, use_json_content_type, timeout, False, False)
         elif response.status_code == 404:
             logger.warning("404: Sorry, the page you are looking for could not be found.")
             logger.debug("Raw_server_response: {}".format(response.text, ))
@@ -170,6 +216,19 @@ class PySendPulse:
                 logger.critical("Raw server response: {}".format(response.text, ))
         return response
 
+    def __http_call(self, method, url, headers, params, timeout):
+        """ Send one HTTP request through pooled session
+
+        @return: HTTP requests library object http://www.python-requests.org/
+        """
+        if method == "POST":
+            return self.__session.post(url, headers=headers, data=params, timeout=timeout)
+        elif method == "PUT":
+            return self.__session.put(url, headers=headers, data=params, timeout=timeout)
+        elif method == "DELETE":
+            return self.__session.delete(url, headers=headers, data=params, timeout=timeout)
+        return self.__session.get(url, headers=headers, params=params, timeout=timeout)
+
     def __handle_result(self, data):
         """ Process request results
 
@@ -218,6 +277,53 @@ class PySendPulse:
         logger.error("Handle error: {}".format(message, ))
         return message
 
+    def __iter_pages(self, fetch_page, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ Iterate over records of limit/offset list endpoint page by page
+
+        @param fetch_page: callable (limit, offset) returning one page of records
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background thread while current one is processed
+        @return: generator of records
+        @raise: Exception API returned error or anything else instead of list of records
+        """
+        page_size = min(page_size or self.MAX_PAGE_SIZE, self.MAX_PAGE_SIZE)
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        offset = 0
+        try:
+            page = fetch_page(page_size, offset)
+            while True:
+                if is_error(page) or not isinstance(page, list):
+                    raise Exception("Could not get records from offset {}: {}".format(offset, page))
+                records = page
+                has_next_page = len(records) >= page_size
+                offset += page_size
+                next_page = executor.submit(fetch_page, page_size, offset) if executor and has_next_page else None
+                for record in records:
+                    yield record
+                if not has_next_page:
+                    return
+                page = next_page.result() if next_page else fetch_page(page_size, offset)
+        finally:
+            if executor:
+                executor.shutdown(wait=False)
+
+    def __update_suppression_list(self, result, list_name, values, remove=False):
+        """ Mirror successful blacklist or unsubscribe change in suppression list
+
+        @param result: dictionary result of API call
+        @param list_name: string one of SuppressionList.LISTS
+        @param values: list of emails or phones, or its JSON
+        @param remove: boolean values were removed from list
+        """
+        if self.__suppression_list is None or is_error(result):
+            return
+        if isinstance(values, str):
+            values = json.loads(values)
+        if remove:
+            self.__suppression_list.remove(list_name, values)
+        else:
+            self.__suppression_list.add(list_name, values)
+
     # ------------------------------------------------------------------ #
     #                             BALANCE                                #
     # ------------------------------------------------------------------ #
@@ -275,6 +381,16 @@ class PySendPulse:
         logger.info("Function call: get_list_of_addressbooks")
         return self.__handle_result(self.__send_request('addressbooks', 'GET', {'limit': limit or 0, 'offset': offset or 0}))
 
+    def iter_list_of_addressbooks(self, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ Iterate over all addressbooks
+
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background while current one is processed
+        @return: generator of records
+        """
+        logger.info("Function call: iter_list_of_addressbooks")
+        return self.__iter_pages(lambda limit, offset: self.get_list_of_addressbooks(limit, offset), page_size, prefetch)
+
     def get_addressbook_info(self, id):
         """ Get information about addressbook
 
@@ -308,6 +424,17 @@ class PySendPulse:
         logger.info("Function call: get_emails_from_addressbook: '{}'".format(id, ))
         return self.__handle_error("Empty addressbook id") if not id else self.__handle_result(self.__send_request('addressbooks/{}/emails'.format(id), 'GET', {'limit': limit or 0, 'offset': offset or 0}))
 
+    def iter_emails_from_addressbook(self, id, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ Iterate over all email addresses from addressbook
+
+        @param id: unsigned int addressbook ID
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background while current one is processed
+        @return: generator of records
+        """
+        logger.info("Function call: iter_emails_from_addressbook")
+        return self.__iter_pages(lambda limit, offset: self.get_emails_from_addressbook(id, limit, offset), page_size, prefetch)
+
     def add_emails_to_addressbook(self, id, emails):
         """ Add new emails to addressbook
 
@@ -396,6 +523,16 @@ class PySendPulse:
         logger.info("Function call: get_list_of_campaigns")
         return self.__handle_result(self.__send_request('campaigns', 'GET', {'limit': limit or 0, 'offset': offset or 0}))
 
+    def iter_list_of_campaigns(self, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ Iterate over all campaigns
+
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background while current one is processed
+        @return: generator of records
+        """
+        logger.info("Function call: iter_list_of_campaigns")
+        return self.__iter_pages(lambda limit, offset: self.get_list_of_campaigns(limit, offset), page_size, prefetch)
+
     def get_campaign_info(self, id):
         """ Get information about campaign
 
@@ -432,7 +569,8 @@ class PySendPulse:
         @param body: string campaign body
         @param addressbook_id: unsigned int addressbook ID
         @param campaign_name: string campaign name
-        @param attachments: dictionary with {filename_1: filebody_1, ..., filename_n: filebody_n}
+        @param attachments: dictionary with {filename_1: filebody_1, ..., filename_n: filebody_n},
+            filebody may be pysendpulse.attachments.Attachment object, it is streamed from disk base64 encoded
         @return: dictionary with response message
         """
         if not attachments:
@@ -446,15 +584,16 @@ class PySendPulse:
             return self.__handle_error('Seems you not pass addressbook ID')
         if not attachments:
             attachments = {}
-        return self.__handle_result(self.__send_request('campaigns', 'POST', {
+        stream = JsonStream()
+        return self.__handle_result(self.__send_request('campaigns', 'POST', stream.body({
             'sender_name': from_name,
             'sender_email': from_email,
             'subject': subject,
             'body': base64.b64encode(body),
             'list_id': addressbook_id,
             'name': campaign_name,
-            'attachments': json.dumps(attachments)
-        }))
+            'attachments': stream.dumps(attachments)
+        })))
 
     def cancel_campaign(self, id):
         """ Cancel campaign
@@ -569,6 +708,16 @@ class PySendPulse:
         logger.info("Function call: get_emails_in_blacklist")
         return self.__handle_result(self.__send_request('blacklist', 'GET', {'limit': limit or 0, 'offset': offset or 0}))
 
+    def iter_emails_in_blacklist(self, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ Iterate over all emails from blacklist
+
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background while current one is processed
+        @return: generator of records
+        """
+        logger.info("Function call: iter_emails_in_blacklist")
+        return self.__iter_pages(lambda limit, offset: self.get_emails_in_blacklist(limit, offset), page_size, prefetch)
+
     def add_email_to_blacklist(self, email, comment=''):
         """ Add email to blacklist
 
@@ -577,7 +726,11 @@ class PySendPulse:
         @return: dictionary with response message
         """
         logger.info("Function call: add_email_to_blacklist for '{}'".format(email, ))
-        return self.__handle_error('Empty email') if not email else self.__handle_result(self.__send_request('blacklist', 'POST', {'emails': base64.b64encode(email), 'comment': comment}))
+        if not email:
+            return self.__handle_error('Empty email')
+        result = self.__handle_result(self.__send_request('blacklist', 'POST', {'emails': base64.b64encode(email.encode('utf-8')).decode('utf-8'), 'comment': comment}))
+        self.__update_suppression_list(result, SuppressionList.EMAIL_BLACKLIST, email.split(','))
+        return result
 
     def delete_email_from_blacklist(self, email):
         """ Remove emails from blacklist
@@ -586,7 +739,11 @@ class PySendPulse:
         @return: dictionary with response message
         """
         logger.info("Function call: delete_email_from_blacklist for '{}'".format(email, ))
-        return self.__handle_error('Empty email') if not email else self.__handle_result(self.__send_request('blacklist', 'DELETE', {'emails': base64.b64encode(email)}))
+        if not email:
+            return self.__handle_error('Empty email')
+        result = self.__handle_result(self.__send_request('blacklist', 'DELETE', {'emails': base64.b64encode(email.encode('utf-8')).decode('utf-8')}))
+        self.__update_suppression_list(result, SuppressionList.EMAIL_BLACKLIST, email.split(','), remove=True)
+        return result
 
     # ------------------------------------------------------------------ #
     #                              SMTP                                  #
@@ -613,6 +770,20 @@ class PySendPulse:
             'recipient': recipient
         }))
 
+    def smtp_iter_list_of_emails(self, date_from=None, date_to=None, sender=None, recipient=None, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ SMTP: iterate over all emails
+
+        @param date_from: string date for filter in 'YYYY-MM-DD'
+        @param date_to: string date for filter in 'YYYY-MM-DD'
+        @param sender:  string from email
+        @param recipient: string for email
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background while current one is processed
+        @return: generator of records
+        """
+        logger.info("Function call: smtp_iter_list_of_emails")
+        return self.__iter_pages(lambda limit, offset: self.smtp_get_list_of_emails(limit, offset, date_from, date_to, sender, recipient), page_size, prefetch)
+
     def smtp_get_email_info_by_id(self, id):
         """ Get information about email by ID
 
@@ -629,7 +800,11 @@ class PySendPulse:
         @return: dictionary with response message
         """
         logger.info("Function call: smtp_add_emails_to_unsubscribe")
-        return self.__handle_error('Empty email') if not emails else self.__handle_result(self.__send_request('smtp/unsubscribe', 'POST', {'emails': json.dumps(emails)}))
+        if not emails:
+            return self.__handle_error('Empty email')
+        result = self.__handle_result(self.__send_request('smtp/unsubscribe', 'POST', {'emails': json.dumps(emails)}))
+        self.__update_suppression_list(result, SuppressionList.SMTP_UNSUBSCRIBE, [email['email'] if isinstance(email, dict) else email for email in emails])
+        return result
 
     def smtp_delete_emails_from_unsubscribe(self, emails):
         """ SMTP: remove emails from unsubscribe list
@@ -638,7 +813,11 @@ class PySendPulse:
         @return: dictionary with response message
         """
         logger.info("Function call: smtp_delete_emails_from_unsubscribe")
-        return self.__handle_error('Empty email') if not emails else self.__handle_result(self.__send_request('smtp/unsubscribe', 'DELETE', {'emails': json.dumps(emails)}))
+        if not emails:
+            return self.__handle_error('Empty email')
+        result = self.__handle_result(self.__send_request('smtp/unsubscribe', 'DELETE', {'emails': json.dumps(emails)}))
+        self.__update_suppression_list(result, SuppressionList.SMTP_UNSUBSCRIBE, emails, remove=True)
+        return result
 
     def smtp_get_list_of_ip(self):
         """ SMTP: get list of IP
@@ -678,6 +857,7 @@ class PySendPulse:
         """ SMTP: send email
 
         @param email: string valid email address. We will send an email message to the specified email address with a verification link.
+            Values of 'attachments_binary' may be pysendpulse.attachments.Attachment objects, they are streamed from disk
         @return: dictionary with response message
         """
         logger.info("Function call: smtp_send_mail")
@@ -687,8 +867,27 @@ class PySendPulse:
             return self.__handle_error('Seems we have empty subject')
         elif not email.get('from') or not email.get('to'):
             return self.__handle_error("Seems we have empty some credentials 'from': '{}' or 'to': '{}' fields".format(email.get('from'), email.get('to')))
-        email['html'] = base64.b64encode(email.get('html').encode('utf-8')).decode('utf-8') if email['html'] else None
-        return self.__handle_result(self.__send_request('smtp/emails', 'POST', {'email': json.dumps(email)}))
+        email = dict(email)
+        email['html'] = base64.b64encode(email.get('html').encode('utf-8')).decode('utf-8') if email.get('html') else None
+        stream = JsonStream()
+        return self.__handle_result(self.__send_request('smtp/emails', 'POST', stream.body({'email': stream.dumps(email)})))
+
+    def smtp_send_prepared_mail(self, prepared, to, **fields):
+        """ SMTP: send prepared email, only recipients and per-recipient fields are serialized
+
+        @param prepared: pysendpulse.smtp.PreparedEmail object
+        @param to: list of recipients [{'name': 'Jane Roe', 'email': 'jane.roe@domain.com'}]
+        @param fields: per-recipient fields absent in prepared email, e.g. template={'id': 1, 'variables': {...}}
+        @return: dictionary with response message
+        """
+        logger.info("Function call: smtp_send_prepared_mail")
+        if not to:
+            return self.__handle_error("Seems we have empty 'to' field")
+        try:
+            body = prepared.request_body(to, **fields)
+        except Exception as e:
+            return self.__handle_error(str(e))
+        return self.__handle_result(self.__send_request('smtp/emails', 'POST', body))
 
     def smtp_send_mail_with_template(self, email):
         """ SMTP: send email with custom template
@@ -718,6 +917,16 @@ class PySendPulse:
         logger.info("Function call: push_get_tasks")
         return self.__handle_result(self.__send_request('push/tasks', 'GET', {'limit': limit or 0, 'offset': offset or 0}))
 
+    def push_iter_tasks(self, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ PUSH: iterate over all tasks
+
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background while current one is processed
+        @return: generator of records
+        """
+        logger.info("Function call: push_iter_tasks")
+        return self.__iter_pages(lambda limit, offset: self.push_get_tasks(limit, offset), page_size, prefetch)
+
     def push_get_websites(self, limit=0, offset=0):
         """ PUSH: get list of websites
 
@@ -728,6 +937,16 @@ class PySendPulse:
         logger.info("Function call: push_get_websites")
         return self.__handle_result(self.__send_request('push/websites', 'GET', {'limit': limit or 0, 'offset': offset or 0}))
 
+    def push_iter_websites(self, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ PUSH: iterate over all websites
+
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background while current one is processed
+        @return: generator of records
+        """
+        logger.info("Function call: push_iter_websites")
+        return self.__iter_pages(lambda limit, offset: self.push_get_websites(limit, offset), page_size, prefetch)
+
     def push_count_websites(self):
         """ PUSH: get amount of websites
 
@@ -756,6 +975,17 @@ class PySendPulse:
         logger.info("Function call: push_get_subscriptions for {}".format(id))
         return self.__handle_result(self.__send_request('push/websites/{}/subscriptions'.format(id), 'GET', {'limit': limit or 0, 'offset': offset or 0}))
 
+    def push_iter_subscriptions(self, id, page_size=MAX_PAGE_SIZE, prefetch=False):
+        """ PUSH: iterate over all subscriptions for website
+
+        @param id: unsigned int website id
+        @param page_size: unsigned int records per request. The max value is 100
+        @param prefetch: boolean fetch next page in background while current one is processed
+        @return: generator of records
+        """
+        logger.info("Function call: push_iter_subscriptions")
+        return self.__iter_pages(lambda limit, offset: self.push_get_subscriptions(id, limit, offset), page_size, prefetch)
+
     def push_count_subscriptions(self, id):
         """ PUSH: get amount of subscriptions for website
 
@@ -953,7 +1183,9 @@ class PySendPulse:
         }
 
         logger.info("Function call: sms_add_phones_to_blacklist")
-        return self.__handle_result(self.__send_request('sms/black_list', 'POST', data_to_send))
+        result = self.__handle_result(self.__send_request('sms/black_list', 'POST', data_to_send))
+        self.__update_suppression_list(result, SuppressionList.SMS_BLACKLIST, phones)
+        return result
 
     def sms_delete_phones_from_blacklist(self, phones):
         """ SMS: remove phones from blacklist
@@ -974,7 +1206,9 @@ class PySendPulse:
         }
 
         logger.info("Function call: sms_add_phones_to_blacklist")
-        return self.__handle_result(self.__send_request('sms/black_list', 'DELETE', data_to_send))
+        result = self.__handle_result(self.__send_request('sms/black_list', 'DELETE', data_to_send))
+        self.__update_suppression_list(result, SuppressionList.SMS_BLACKLIST, phones, remove=True)
+        return result
 
     @deprecated(version='0.1.4', reason="You should use sms_add_campaign_by_addressbook_id")
     def sms_add_campaign(self, sender_name, addressbook_id, body, date=None, transliterate=False):
@@ -0,0 +1,225 @@
+# -*- encoding:utf8 -*-
+
+""" Client-side rate limiting for SendPulse REST API calls
+"""
+
+import time
+import threading
+import memcache
+
+
+class TokenBucket:
+    """ Thread-safe token bucket
+
+    Bucket holds up to `capacity` tokens and is refilled with `rate` tokens per second.
+    Every request takes one token and waits while the bucket is empty.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """ Token bucket constructor
+
+        @param rate: float tokens added per second
+        @param capacity: float max tokens in bucket, allowed burst size. Default is max(1, rate)
+        @raise: Exception rate is not positive
+        """
+        if not rate or rate <= 0:
+            raise Exception("Rate limit must be positive, got '{}'".format(rate))
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity else max(1.0, self.rate))
+        self.__tokens = self.capacity
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def __refill(self):
+        now = time.monotonic()
+        self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated_at) * self.rate)
+        self.__updated_at = now
+
+    def try_acquire(self, tokens=1):
+        """ Take tokens without waiting
+
+        @param tokens: float amount of tokens to take
+        @return: float 0 if tokens were taken, otherwise seconds to wait before next attempt
+        """
+        with self.__lock:
+            self.__refill()
+            if self.__tokens >= tokens:
+                self.__tokens -= tokens
+                return 0
+            return (tokens - self.__tokens) / self.rate
+
+    def release(self, tokens=1):
+        """ Give back tokens taken for request which was not sent
+
+        @param tokens: float amount of tokens to give back
+        """
+        with self.__lock:
+            self.__refill()
+            self.__tokens = min(self.capacity, self.__tokens + tokens)
+
+    def acquire(self, tokens=1):
+        """ Take tokens, block current thread until they are available
+
+        @param tokens: float amount of tokens to take
+        @return: float seconds spent waiting
+        """
+        waited = 0
+        while True:
+            delay = self.try_acquire(tokens)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+class MemcachedRateBucket:
+    """ Rate limit shared by all processes through Memcached
+
+    Requests are counted per time window with atomic incr, so any number of processes using
+    the same key stay under the limit together. If Memcached is not available requests are not limited.
+    """
+
+    def __init__(self, rate, key, memcached_host="127.0.0.1:11211", client=None, window=1.0):
+        """ Shared bucket constructor
+
+        @param rate: float requests allowed per second
+        @param key: string counter key, must be the same in all processes sharing the limit
+        @param memcached_host: string Host for Memcached server, default is 127.0.0.1:11211
+        @param client: memcache.Client object to reuse instead of creating new one
+        @param window: float seconds in one counting window
+        @raise: Exception rate is not positive
+        """
+        if not rate or rate <= 0:
+            raise Exception("Rate limit must be positive, got '{}'".format(rate))
+        if client is None:
+            client = memcache.Client([memcached_host])
+        self.client = client
+        self.key = key
+        self.window = float(window)
+        self.limit = max(1, int(rate * self.window))
+
+    def try_acquire(self, tokens=1):
+        """ Count request in current window
+
+        @param tokens: unsigned int amount of requests
+        @return: float 0 if request is allowed, otherwise seconds till the next window
+        """
+        now = time.time()
+        window = int(now / self.window)
+        key = "{}:{}".format(self.key, window)
+        count = self.client.incr(key, tokens)
+        if count is None:
+            if self.client.add(key, tokens, int(self.window) + 1):
+                count = tokens
+            else:
+                count = self.client.incr(key, tokens)
+            if count is None:
+                return 0
+        if int(count) <= self.limit:
+            return 0
+        return max(0.001, (window + 1) * self.window - now)
+
+    def acquire(self, tokens=1):
+        """ Count request, block current thread until it is allowed
+
+        @param tokens: unsigned int amount of requests
+        @return: float seconds spent waiting
+        """
+        waited = 0
+        while True:
+            delay = self.try_acquire(tokens)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """ Rate limits for groups of API endpoints
+
+    Every group gets its own local token bucket and, if Memcached is configured, a bucket shared with other processes.
+    Groups: smtp, sms, addressbooks (with emails, campaigns, senders and blacklist), push, events
+    and default for all other endpoints.
+    Groups without own limit use 'default' one, requests are not limited if there is no 'default' limit either.
+    """
+    PATH_GROUPS = {
+        'smtp': 'smtp',
+        'sms': 'sms',
+        'addressbooks': 'addressbooks',
+        'emails': 'addressbooks',
+        'campaigns': 'addressbooks',
+        'senders': 'addressbooks',
+        'blacklist': 'addressbooks',
+        'push': 'push',
+        'events': 'events',
+    }
+    DEFAULT_GROUP = 'default'
+
+    def __init__(self, limits, memcached_host=None, memcached_client=None, key="pysendpulse:rate"):
+        """ Rate limiter constructor
+
+        @param limits: dictionary {'smtp': 10, 'sms': 5, 'default': 20} requests per second for every group
+        @param memcached_host: string Host for Memcached server to share limits between processes
+        @param memcached_client: memcache.Client object to share limits between processes, e.g. the one of token storage
+        @param key: string prefix of Memcached counters, use the same one for all processes of one API account
+        """
+        self.__local = {}
+        self.__shared = {}
+        if memcached_host and memcached_client is None:
+            memcached_client = memcache.Client([memcached_host])
+        for group, rate in limits.items():
+            if not rate:
+                continue
+            self.__local[group] = TokenBucket(rate)
+            if memcached_client is not None:
+                self.__shared[group] = MemcachedRateBucket(rate, "{}:{}".format(key, group), client=memcached_client)
+
+    @property
+    def shared(self):
+        """ Limits are shared through Memcached, so taking permission may wait for network
+        """
+        return bool(self.__shared)
+
+    @classmethod
+    def get_group(cls, path):
+        """ Get endpoint group by API path
+
+        @param path: string API path, e.g. 'smtp/emails'
+        @return: string group name
+        """
+        return cls.PATH_GROUPS.get(path.lstrip('/').split('/', 1)[0], cls.DEFAULT_GROUP)
+
+    def __buckets(self, path):
+        group = self.get_group(path)
+        if group not in self.__local:
+            group = self.DEFAULT_GROUP
+        return self.__local.get(group), self.__shared.get(group)
+
+    def try_acquire(self, path):
+        """ Take permission to call endpoint without waiting
+
+        @param path: string API path
+        @return: float 0 if request is allowed, otherwise seconds to wait before next attempt
+        """
+        local, shared = self.__buckets(path)
+        delay = local.try_acquire() if local else 0
+        if not delay and shared:
+            delay = shared.try_acquire()
+            if delay and local:
+                # request is not sent, so local token must not be spent on it
+                local.release()
+        return delay
+
+    def acquire(self, path):
+        """ Take permission to call endpoint, block current thread until it is allowed
+
+        @param path: string API path
+        @return: float seconds spent waiting
+        """
+        waited = 0
+        while True:
+            delay = self.try_acquire(path)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
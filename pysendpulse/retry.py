@@ -0,0 +1,130 @@
+# -*- encoding:utf8 -*-
+
+""" Retry policy for SendPulse REST API calls
+"""
+
+import time
+import random
+import asyncio
+import requests
+from email.utils import parsedate_to_datetime
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+RETRYABLE_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+NOT_SENT_EXCEPTIONS = (requests.exceptions.ConnectTimeout, )
+# requests raises plain ConnectionError when connection is refused, urllib3 error it wraps tells it was not opened
+NOT_SENT_CAUSES = (NewConnectionError, ConnectTimeoutError)
+if aiohttp is not None:
+    RETRYABLE_EXCEPTIONS += (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+    NOT_SENT_EXCEPTIONS += (aiohttp.ClientConnectorError, )
+
+
+def is_not_sent(exception):
+    """ Check if request surely did not reach server because connection could not be opened
+
+    @param exception: Exception raised instead of response
+    @return: boolean
+    """
+    if isinstance(exception, NOT_SENT_EXCEPTIONS):
+        return True
+    seen = set()
+    while exception is not None and id(exception) not in seen:
+        if isinstance(exception, NOT_SENT_CAUSES):
+            return True
+        seen.add(id(exception))
+        # requests keeps urllib3 MaxRetryError in args, it keeps the original error in reason
+        cause = getattr(exception, 'reason', None)
+        if not isinstance(cause, BaseException) and exception.args and isinstance(exception.args[0], BaseException):
+            cause = exception.args[0]
+        exception = cause if isinstance(cause, BaseException) else exception.__cause__
+    return False
+
+
+class RetryPolicy:
+    """ When and how long to wait before repeating failed API request
+
+    Idempotent requests (GET, PUT, DELETE) are repeated on retryable status codes and connection errors.
+    POST requests are only repeated when server surely did not process them: on 429 response or when
+    connection could not be opened, unless retry_non_idempotent is set.
+    """
+    DEFAULT_STATUS_CODES = (429, 500, 502, 503, 504)
+    IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE')
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_cap=30.0, jitter=True, status_codes=DEFAULT_STATUS_CODES,
+                 exceptions=RETRYABLE_EXCEPTIONS, retry_non_idempotent=False, respect_retry_after=True):
+        """ Retry policy constructor
+
+        @param max_attempts: unsigned int max number of attempts including the first one, 1 disables retries
+        @param backoff_base: float seconds to wait before the first retry, doubled on every next one
+        @param backoff_cap: float max seconds to wait before retry
+        @param jitter: boolean randomize delay to spread retries of concurrent clients
+        @param status_codes: tuple of HTTP codes to retry on
+        @param exceptions: tuple of exception classes to retry on
+        @param retry_non_idempotent: boolean repeat POST requests on any retryable failure
+        @param respect_retry_after: boolean wait as long as Retry-After header says, up to backoff_cap
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        self.status_codes = tuple(status_codes)
+        self.exceptions = tuple(exceptions)
+        self.retry_non_idempotent = retry_non_idempotent
+        self.respect_retry_after = respect_retry_after
+
+    def should_retry(self, method, attempt, status_code=None, exception=None):
+        """ Check if request should be repeated
+
+        @param method: HTTP method GET|POST|PUT|DELETE
+        @param attempt: unsigned int number of failed attempt, starting from 1
+        @param status_code: int HTTP code of response
+        @param exception: Exception raised instead of response
+        @return: boolean
+        """
+        if attempt >= self.max_attempts:
+            return False
+        idempotent = self.retry_non_idempotent or method.upper() in self.IDEMPOTENT_METHODS
+        if exception is not None:
+            if not isinstance(exception, self.exceptions):
+                return False
+            return idempotent or is_not_sent(exception)
+        if status_code not in self.status_codes:
+            return False
+        return idempotent or status_code == 429
+
+    def get_delay(self, attempt, retry_after=None):
+        """ Get seconds to wait before next attempt
+
+        @param attempt: unsigned int number of failed attempt, starting from 1
+        @param retry_after: string value of Retry-After header: seconds or HTTP date
+        @return: float
+        """
+        if retry_after and self.respect_retry_after:
+            delay = self.parse_retry_after(retry_after)
+            if delay is not None:
+                return min(delay, self.backoff_cap)
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value):
+        """ Parse Retry-After header
+
+        @param value: string seconds or HTTP date
+        @return: float seconds or None if value can't be parsed
+        """
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            return None
@@ -0,0 +1,78 @@
+# -*- encoding:utf8 -*-
+
+""" Coalescing of identical concurrent calls
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """ Runs only one call per key at a time, concurrent callers with the same key wait for it and share its result
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self.__calls = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        """ Call func or wait for the same call running in another thread
+
+        @param key: hashable call key
+        @param func: callable
+        @param args: arguments of func
+        @return: result of func
+        @raise: exception raised by func
+        """
+        with self.__lock:
+            future = self.__calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.__calls[key] = future
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+
+
+class AsyncSingleFlight:
+    """ Runs only one coroutine per key at a time, concurrent callers with the same key await it and share its result
+
+    Call runs as a separate task, so cancellation of one caller does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self.__calls = {}
+
+    async def do(self, key, func, *args):
+        """ Await func or the same call started by another coroutine
+
+        @param key: hashable call key
+        @param func: coroutine function
+        @param args: arguments of func
+        @return: result of func
+        @raise: exception raised by func
+        """
+        task = self.__calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self.__calls[key] = task
+            task.add_done_callback(lambda _: self.__calls.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
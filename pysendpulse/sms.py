@@ -0,0 +1,245 @@
+# -*- encoding:utf8 -*-
+
+""" Bulk helpers for SendPulse SMS API
+"""
+
+import re
+import math
+import hashlib
+import logging
+
+from pysendpulse.bulk import double_encoded_size, is_error, iter_numbered_batches, run_concurrently
+from pysendpulse.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PHONE_SEPARATORS = re.compile(r'[\s\-().\/]')
+E164_DIGITS = re.compile(r'^[1-9][0-9]{7,14}$')
+
+
+def normalize_phone(phone, default_country_code=None):
+    """ Normalize phone to E.164 digits without leading '+', as SendPulse API takes them
+
+    Spaces, dashes, dots, slashes and brackets are removed, '+' and '00' international prefixes are dropped.
+    Numbers with national trunk prefix '0' get default country code instead of it.
+
+    @param phone: string|int phone, e.g. '+38 (093) 123-45-67'
+    @param default_country_code: string country code for numbers in national format, e.g. '380'
+    @return: string e.g. '380931234567' or None if phone is not valid
+    """
+    phone = PHONE_SEPARATORS.sub('', str(phone))
+    if phone.startswith('+'):
+        phone = phone[1:]
+    elif phone.startswith('00'):
+        phone = phone[2:]
+    elif phone.startswith('0') and default_country_code:
+        phone = "{}{}".format(default_country_code, phone[1:])
+    return phone if E164_DIGITS.match(phone) else None
+
+
+class BloomFilter:
+    """ Set membership test in fixed memory with small false positive rate
+
+    Memory is taken once from expected amount of items and error rate, about 1.8 MB per million items at 0.1%.
+    """
+
+    def __init__(self, expected_count, error_rate=0.001):
+        """ Bloom filter constructor
+
+        @param expected_count: unsigned int expected amount of items, false positive rate grows when it is exceeded
+        @param error_rate: float probability to report a new item as already added
+        """
+        expected_count = max(1, expected_count)
+        self.size = max(8, int(math.ceil(-expected_count * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / expected_count * math.log(2))))
+        self.__bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item):
+        """ Add item
+
+        @param item: string item
+        @return: boolean True if item was not added before, False if it was or in case of false positive
+        """
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        bits = self.__bits
+        added = False
+        for number in range(self.hashes):
+            position = (first + number * second) % self.size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        return added
+
+
+class PhoneFilter:
+    """ Normalization and deduplication of phones before upload
+
+    Phones are normalized with normalize_phone, invalid ones and duplicates are dropped and counted.
+    Exact deduplication keeps every number as int in a set. For tens of millions of numbers set expected_count
+    to use BloomFilter of fixed size instead, then a small share of unique numbers may be dropped as duplicates.
+    """
+
+    def __init__(self, default_country_code=None, expected_count=None, error_rate=0.001, on_drop=None):
+        """ Phone filter constructor
+
+        @param default_country_code: string country code for numbers in national format, e.g. '380'
+        @param expected_count: unsigned int expected amount of numbers, enables Bloom filter
+        @param error_rate: float share of unique numbers Bloom filter may drop as duplicates
+        @param on_drop: callable (phone, reason) called for every dropped phone, reason is 'invalid' or 'duplicate'
+        """
+        self.default_country_code = default_country_code
+        self.on_drop = on_drop
+        self.stats = {'total': 0, 'accepted': 0, 'invalid': 0, 'duplicates': 0}
+        self.__seen = set()
+        self.__bloom = BloomFilter(expected_count, error_rate) if expected_count else None
+
+    def __drop(self, phone, reason):
+        self.stats['invalid' if reason == 'invalid' else 'duplicates'] += 1
+        if self.on_drop:
+            self.on_drop(phone, reason)
+
+    def check(self, phone):
+        """ Normalize phone and remember it
+
+        @param phone: string|int phone
+        @return: string normalized phone or None if it is invalid or already seen
+        """
+        self.stats['total'] += 1
+        normalized = normalize_phone(phone, self.default_country_code)
+        if normalized is None:
+            self.__drop(phone, 'invalid')
+            return None
+        if self.__bloom is not None:
+            is_new = self.__bloom.add(normalized)
+        else:
+            key = int(normalized)
+            is_new = key not in self.__seen
+            self.__seen.add(key)
+        if not is_new:
+            self.__drop(phone, 'duplicate')
+            return None
+        self.stats['accepted'] += 1
+        return normalized
+
+    def filter(self, phones):
+        """ Normalized unique phones, for sms_add_phones and sms_delete_phones
+
+        @param phones: iterable of phones, generators are read lazily
+        @return: generator of strings
+        """
+        for phone in phones:
+            normalized = self.check(phone)
+            if normalized is not None:
+                yield normalized
+
+    def filter_variables(self, phones):
+        """ Normalized unique phones with variables, for sms_add_phones_with_variables
+
+        @param phones: dictionary {phone: variables} or iterable of (phone, variables) tuples
+        @return: generator of (phone, variables) tuples, dict() of a batch of them is ready for upload
+        """
+        if isinstance(phones, dict):
+            phones = phones.items()
+        for phone, variables in phones:
+            normalized = self.check(phone)
+            if normalized is not None:
+                yield normalized, variables
+
+
+class SmsDispatcher:
+    """ Sending of one SMS to a big list of phones
+
+    Phones are taken from any iterable, split into batches by amount and by request size
+    and sent with sms_add_campaign_by_phones by a bounded thread pool.
+    Every batch becomes a separate campaign, their ids are collected into the report.
+    """
+    DEFAULT_BATCH_SIZE = 1000
+    DEFAULT_MAX_BATCH_BYTES = 256 * 1024
+
+    def __init__(self, client, sender_name, body, batch_size=DEFAULT_BATCH_SIZE, max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+                 max_workers=4, max_retries=0, retry_delay=1.0, rate_limit=None):
+        """ Dispatcher constructor
+
+        @param client: PySendPulse object
+        @param sender_name: string senders name
+        @param body: string sms text
+        @param batch_size: unsigned int max phones in one request
+        @param max_batch_bytes: unsigned int max size of phones JSON in one request
+        @param max_workers: unsigned int max number of requests running at the same time
+        @param max_retries: unsigned int how many times batch is sent again after server error, may cause duplicates
+        @param retry_delay: float seconds before first retry, doubled on every next one
+        @param rate_limit: float max requests per second, not limited if not set
+        """
+        self.client = client
+        self.sender_name = sender_name
+        self.body = body
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+
+    def add_campaign(self, phones, additional_params=None):
+        """ Create sms campaigns for all phones with sms_add_campaign_by_phones
+
+        @param phones: iterable of phones, generators are read lazily
+        @param additional_params: dictionary additional params for sms task
+        @return: dictionary with report, see dispatch()
+        """
+        logger.info("Bulk sms campaign from '{}'".format(self.sender_name, ))
+        return self.dispatch(phones, lambda batch: self.client.sms_add_campaign_by_phones(
+            self.sender_name, batch, self.body, additional_params or {}))
+
+    def send(self, phones, date=None, transliterate=False):
+        """ Same as add_campaign with date and transliterate params
+
+        @param phones: iterable of phones, generators are read lazily
+        @param date: string date for filter in 'Y-m-d H:i:s'
+        @param transliterate: boolean need to transliterate sms body or not
+        @return: dictionary with report, see dispatch()
+        """
+        additional_params = {'transliterate': transliterate}
+        if date:
+            additional_params['date'] = date
+        return self.add_campaign(phones, additional_params)
+
+    def dispatch(self, phones, send_batch):
+        """ Send all phones batch by batch
+
+        @param phones: iterable of phones, generators are read lazily
+        @param send_batch: callable taking list of phones and returning PySendPulse method result
+        @return: dictionary with report {'total': int, 'succeeded': int, 'failed': int, 'batches': int,
+                'campaign_ids': [...],
+                'failures': [{'batch': 0, 'offset': 0, 'count': 1000, 'attempts': 1, 'phones': [...], 'result': {...}}, {...}]
+            }
+        """
+        jobs = iter_numbered_batches(phones, self.batch_size, self.max_batch_bytes, double_encoded_size)
+        report = {'total': 0, 'succeeded': 0, 'failed': 0, 'batches': 0, 'campaign_ids': [], 'failures': []}
+        campaign_ids = []
+        results = run_concurrently(lambda job: send_batch(job[2]), jobs,
+                                   self.max_workers, self.rate_limiter, self.max_retries, self.retry_delay)
+        for (number, offset, batch), result, attempts in results:
+            report['total'] += len(batch)
+            report['batches'] += 1
+            if is_error(result):
+                report['failed'] += len(batch)
+                report['failures'].append({
+                    'batch': number,
+                    'offset': offset,
+                    'count': len(batch),
+                    'attempts': attempts,
+                    'phones': batch,
+                    'result': result
+                })
+                logger.warning("Sms batch {} from offset {} failed: {}".format(number, offset, result))
+                continue
+            report['succeeded'] += len(batch)
+            campaign_id = result.get('campaign_id') if isinstance(result, dict) else None
+            if campaign_id is not None:
+                campaign_ids.append((number, campaign_id))
+        report['campaign_ids'] = [campaign_id for _, campaign_id in sorted(campaign_ids)]
+        report['failures'].sort(key=lambda failure: failure['batch'])
+        return report
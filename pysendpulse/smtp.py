@@ -0,0 +1,294 @@
+# -*- encoding:utf8 -*-
+
+""" High-throughput helpers for SendPulse SMTP API
+"""
+
+import time
+import base64
+import random
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+from pysendpulse.attachments import Attachment, JsonStream
+from pysendpulse.bulk import is_error, is_retryable, run_concurrently
+from pysendpulse.rate_limiter import TokenBucket
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+
+class PreparedEmail:
+    """ Immutable SMTP message prepared once and sent to many recipients
+
+    HTML body and binary attachments are base64 encoded once, all common fields are serialized to JSON once.
+    Every send only serializes recipients and other per-recipient fields, e.g. template with personal variables.
+    Attachments are kept out of serialized JSON and streamed into every request body, so they are never copied.
+    """
+
+    def __init__(self, email):
+        """ Prepare message
+
+        @param email: dictionary same as for smtp_send_mail, 'to' may be omitted. Values of 'attachments_binary'
+            may be bytes or Attachment objects, 'html' is base64 encoded. Dictionary is not modified.
+        @raise: Exception empty subject or sender
+        """
+        if not email.get('subject'):
+            raise Exception('Seems we have empty subject')
+        if not email.get('from'):
+            raise Exception("Seems we have empty 'from' field")
+        common = dict(email)
+        common.pop('to', None)
+        if common.get('html'):
+            common['html'] = base64.b64encode(common['html'].encode('utf-8')).decode('utf-8')
+        if common.get('attachments_binary'):
+            common['attachments_binary'] = dict(
+                (name, Attachment.from_bytes(content) if isinstance(content, bytes) else content)
+                for name, content in common['attachments_binary'].items())
+        self.__fields = frozenset(common)
+        self.__has_body = bool(common.get('template') or common.get('html') or common.get('text'))
+        self.__stream = JsonStream()
+        common_json = self.__stream.dumps(common)
+        # JSON object without closing brace, escaped once more since API takes email as JSON string,
+        # attachment placeholders have no characters to escape
+        self.__head = json.dumps(common_json[:-1])[1:-1]
+        self.__separator = ', ' if common else ''
+
+    @property
+    def fields(self):
+        """ Names of common fields
+        """
+        return self.__fields
+
+    def request_body(self, to, **fields):
+        """ Build serialized request body for smtp/emails
+
+        @param to: list of recipients [{'name': 'Jane Roe', 'email': 'jane.roe@domain.com'}]
+        @param fields: per-recipient fields absent in common part, e.g. template={'id': 1, 'variables': {...}}
+        @return: string JSON request body or JsonStream object if message has attachments
+        @raise: Exception field is already in common part or message has no body
+        """
+        duplicates = self.__fields.intersection(fields)
+        if duplicates:
+            raise Exception("Fields {} are already set in prepared email".format(sorted(duplicates)))
+        if not self.__has_body and not (fields.get('template') or fields.get('html') or fields.get('text')):
+            raise Exception('Missing email body - specify a template, html or text content')
+        fields['to'] = to
+        tail = json.dumps(fields)[1:]
+        return self.__stream.wrap('{{"email": "{}{}{}"}}'.format(self.__head, self.__separator, json.dumps(tail)[1:-1]))
+
+
+class SmtpSendPipeline:
+    """ Queue of SMTP messages sent by a pool of worker threads
+
+    Callers enqueue messages and get a Future with the result of smtp_send_mail.
+    Workers share connection pool, retry policy and rate limiter of the client, so client pool_maxsize
+    should be not less than amount of workers. When the queue is full submit() blocks or raises queue.Full.
+    """
+    DEFAULT_WORKERS = 8
+    DEFAULT_QUEUE_SIZE = 1000
+    __STOP = object()
+
+    def __init__(self, client, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, max_retries=0, retry_delay=1.0, send_func=None):
+        """ Pipeline constructor, workers are started immediately
+
+        @param client: PySendPulse object
+        @param workers: unsigned int number of worker threads
+        @param queue_size: unsigned int max messages waiting in queue
+        @param max_retries: unsigned int how many times message is sent again after server error, may cause duplicates
+        @param retry_delay: float seconds before first retry, doubled on every next one
+        @param send_func: callable taking message and returning API result, client.smtp_send_mail by default
+        """
+        self.client = client
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.send_func = send_func or client.smtp_send_mail
+        self.sent = 0
+        self.failed = 0
+        self.__lock = threading.Lock()
+        self.__submit_lock = threading.Lock()
+        self.__closed = False
+        self.__queue = queue.Queue(maxsize=queue_size)
+        self.__workers = []
+        for number in range(max(1, workers)):
+            worker = threading.Thread(target=self.__work, name="pysendpulse-smtp-{}".format(number))
+            worker.daemon = True
+            worker.start()
+            self.__workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def pending(self):
+        """ Amount of messages waiting in queue
+        """
+        return self.__queue.qsize()
+
+    def submit(self, email, block=True, timeout=None):
+        """ Enqueue message
+
+        @param email: dictionary message for smtp_send_mail, it is not modified
+        @param block: boolean wait for free place in queue or raise queue.Full at once
+        @param timeout: float max seconds to wait for free place in queue
+        @return: concurrent.futures.Future object with result of smtp_send_mail
+        @raise: queue.Full queue is full, Exception pipeline is closed
+        """
+        future = Future()
+        deadline = time.monotonic() + timeout if block and timeout is not None else None
+        # close() takes the same lock, so no message is enqueued after workers stop signals
+        if not self.__submit_lock.acquire(block, timeout if deadline is not None else -1):
+            raise queue.Full
+        try:
+            if self.__closed:
+                raise Exception("SMTP send pipeline is closed")
+            self.__queue.put((email, future), block, None if deadline is None else max(0, deadline - time.monotonic()))
+        finally:
+            self.__submit_lock.release()
+        return future
+
+    def send(self, email, timeout=None):
+        """ Enqueue message and wait for its result
+
+        @param email: dictionary message for smtp_send_mail
+        @param timeout: float max seconds to wait for result
+        @return: dictionary with response message
+        """
+        return self.submit(email).result(timeout)
+
+    def join(self):
+        """ Wait until all enqueued messages are sent
+        """
+        self.__queue.join()
+
+    def close(self, wait=True):
+        """ Stop accepting messages and stop workers after queue is drained
+
+        @param wait: boolean wait for workers to finish
+        """
+        with self.__submit_lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            for _ in self.__workers:
+                self.__queue.put(self.__STOP)
+        if wait:
+            for worker in self.__workers:
+                worker.join()
+
+    def __send(self, email):
+        attempts = 0
+        while True:
+            attempts += 1
+            result = self.send_func(dict(email))
+            if attempts > self.max_retries or not is_retryable(result):
+                return result
+            time.sleep(self.retry_delay * (2 ** (attempts - 1)) * (0.5 + random.random() / 2))
+
+    def __work(self):
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is self.__STOP:
+                    return
+                email, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = self.__send(email)
+                except Exception as e:
+                    logger.error("SMTP send failed: {}".format(e, ))
+                    with self.__lock:
+                        self.failed += 1
+                    future.set_exception(e)
+                else:
+                    with self.__lock:
+                        if is_error(result):
+                            self.failed += 1
+                        else:
+                            self.sent += 1
+                    future.set_result(result)
+            finally:
+                self.__queue.task_done()
+
+
+class TemplateBulkSender:
+    """ Personalized sending of one SMTP template to a stream of recipients
+
+    Common part of the message (subject, sender and other shared fields) is serialized once as PreparedEmail,
+    every recipient only adds its address and template variables. Messages are sent concurrently, only
+    max_workers * 2 recipients are read from the stream at a time.
+    """
+
+    def __init__(self, client, template_id, subject, sender, variables=None, extra=None, max_workers=8, max_retries=0,
+                 retry_delay=1.0, rate_limit=None):
+        """ Bulk template sender constructor
+
+        @param client: PySendPulse object
+        @param template_id: string|int ID of the template uploaded in the service
+        @param subject: string email subject
+        @param sender: dictionary {'name': 'John Doe', 'email': 'john.doe@domain.com'}
+        @param variables: dictionary template variables common for all recipients
+        @param extra: dictionary other email fields common for all recipients, e.g. 'bcc' or 'attachments'
+        @param max_workers: unsigned int max messages sent at the same time
+        @param max_retries: unsigned int how many times message is sent again after server error, may cause duplicates
+        @param retry_delay: float seconds before first retry, doubled on every next one
+        @param rate_limit: float max messages per second, not limited if not set
+        """
+        self.client = client
+        self.variables = variables or {}
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.common = dict(extra or {})
+        self.common.update({
+            'subject': subject,
+            'from': sender,
+            'html': None,
+            'text': None,
+        })
+        self.template_id = template_id
+        self.prepared = PreparedEmail(self.common)
+
+    def __personal_fields(self, recipient):
+        variables = self.variables
+        if recipient.get('variables'):
+            variables = dict(variables)
+            variables.update(recipient['variables'])
+        to = [{'name': recipient.get('name', ''), 'email': recipient['email']}]
+        return to, {'id': self.template_id, 'variables': variables}
+
+    def build_email(self, recipient):
+        """ Build message for one recipient
+
+        @param recipient: dictionary {'email': 'jane.roe@domain.com', 'name': 'Jane Roe', 'variables': {...}}
+        @return: dictionary email for smtp_send_mail
+        """
+        email = dict(self.common)
+        email['to'], email['template'] = self.__personal_fields(recipient)
+        return email
+
+    def __send_one(self, recipient):
+        to, template = self.__personal_fields(recipient)
+        return self.client.smtp_send_prepared_mail(self.prepared, to, template=template)
+
+    def send(self, recipients):
+        """ Send template to all recipients
+
+        @param recipients: iterable of dictionaries {'email': 'jane.roe@domain.com', 'name': 'Jane Roe', 'variables': {...}}
+        @return: generator of (recipient, result) tuples in completion order
+        """
+        logger.info("Bulk send of SMTP template {}".format(self.template_id, ))
+        results = run_concurrently(self.__send_one, recipients,
+                                   self.max_workers, self.rate_limiter, self.max_retries, self.retry_delay)
+        for recipient, result, _ in results:
+            yield recipient, result
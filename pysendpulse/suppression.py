@@ -0,0 +1,255 @@
+# -*- encoding:utf8 -*-
+
+""" Local mirror of SendPulse blacklists and unsubscribe list
+"""
+
+import os
+import sys
+import time
+import array
+import hashlib
+import logging
+import threading
+
+from pysendpulse.sms import normalize_phone
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+
+class SuppressionList:
+    """ Emails and phones which must not get messages, checked locally without API calls
+
+    Every entry is kept as 64 bit key: phones as normalized number, emails as hash of lowercased address,
+    so membership check is one set lookup. File keeps keys as binary arrays, 8 bytes per entry, every add()
+    and remove() is appended to journal file next to it and replayed by load() until the next save().
+    Lists are downloaded with sync() and updated by PySendPulse when it is created with suppression_list
+    and blacklist or unsubscribe methods succeed.
+    """
+    EMAIL_BLACKLIST = 'email_blacklist'
+    SMTP_UNSUBSCRIBE = 'smtp_unsubscribe'
+    SMS_BLACKLIST = 'sms_blacklist'
+    LISTS = (EMAIL_BLACKLIST, SMTP_UNSUBSCRIBE, SMS_BLACKLIST)
+    __MAGIC = b'PYSENDPULSE-SUPPRESSION-1\n'
+
+    def __init__(self, path=None, default_country_code=None):
+        """ Suppression list constructor, saved lists are loaded at once
+
+        @param path: string file to save lists to, lists are kept in memory only if not set
+        @param default_country_code: string country code for phones in national format, e.g. '380'
+        """
+        self.path = path
+        self.default_country_code = default_country_code
+        self.synced_at = None
+        self.__lists = dict((name, set()) for name in self.LISTS)
+        self.__sync_changes = None
+        self.__lock = threading.Lock()
+        if path and (os.path.isfile(path) or os.path.isfile(self.journal_path)):
+            self.load()
+
+    @staticmethod
+    def __email_key(email):
+        digest = hashlib.blake2b(email.strip().lower().encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def __phone_key(self, phone):
+        normalized = normalize_phone(phone, self.default_country_code)
+        if normalized is None:
+            return self.__email_key(str(phone))
+        return int(normalized)
+
+    def __key(self, list_name, value):
+        if list_name not in self.__lists:
+            raise Exception("Unknown suppression list '{}', use one of {}".format(list_name, self.LISTS))
+        return self.__phone_key(value) if list_name == self.SMS_BLACKLIST else self.__email_key(value)
+
+    @property
+    def journal_path(self):
+        """ File with changes made after the last save()
+        """
+        return "{}.journal".format(self.path) if self.path else None
+
+    def __apply(self, operation, list_name, keys):
+        if operation == 'add':
+            self.__lists[list_name].update(keys)
+        else:
+            self.__lists[list_name].difference_update(keys)
+
+    def __change(self, operation, list_name, values):
+        keys = [self.__key(list_name, value) for value in values]
+        with self.__lock:
+            self.__apply(operation, list_name, keys)
+            if self.__sync_changes is not None:
+                self.__sync_changes.append((operation, list_name, keys))
+            if self.path:
+                with open(self.journal_path, 'a') as f:
+                    f.write(json.dumps([operation, list_name, keys]) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def add(self, list_name, values):
+        """ Add entries to list and append them to journal
+
+        @param list_name: string one of LISTS
+        @param values: iterable of emails or phones
+        """
+        self.__change('add', list_name, values)
+
+    def remove(self, list_name, values):
+        """ Remove entries from list and append them to journal
+
+        @param list_name: string one of LISTS
+        @param values: iterable of emails or phones
+        """
+        self.__change('remove', list_name, values)
+
+    def contains(self, list_name, value):
+        """ Check if value is in list
+
+        @param list_name: string one of LISTS
+        @param value: string email or phone
+        @return: boolean
+        """
+        return self.__key(list_name, value) in self.__lists[list_name]
+
+    def is_email_suppressed(self, email):
+        """ Check if email is blacklisted or unsubscribed from SMTP
+
+        @param email: string email
+        @return: boolean
+        """
+        key = self.__email_key(email)
+        return key in self.__lists[self.EMAIL_BLACKLIST] or key in self.__lists[self.SMTP_UNSUBSCRIBE]
+
+    def is_phone_suppressed(self, phone):
+        """ Check if phone is in SMS blacklist
+
+        @param phone: string|int phone
+        @return: boolean
+        """
+        return self.__phone_key(phone) in self.__lists[self.SMS_BLACKLIST]
+
+    def count(self, list_name):
+        """ Amount of entries in list
+
+        @param list_name: string one of LISTS
+        @return: unsigned int
+        """
+        return len(self.__lists[list_name])
+
+    def sync(self, client, lists=(EMAIL_BLACKLIST, SMS_BLACKLIST)):
+        """ Replace lists with ones downloaded from API and save them
+
+        SMTP unsubscribe list can't be downloaded, it is only filled by add() and client calls.
+        Changes made by add() and remove() while lists are downloaded are applied on top of downloaded lists.
+
+        @param client: PySendPulse object
+        @param lists: tuple of list names to download
+        @return: dictionary {list_name: amount of entries}
+        @raise: Exception API returned error
+        """
+        with self.__lock:
+            self.__sync_changes = []
+        try:
+            downloaded = self.__download(client, lists)
+        except Exception:
+            with self.__lock:
+                self.__sync_changes = None
+            raise
+        with self.__lock:
+            self.__lists.update(downloaded)
+            for operation, list_name, keys in self.__sync_changes:
+                if list_name in downloaded:
+                    self.__apply(operation, list_name, keys)
+            self.__sync_changes = None
+            self.synced_at = time.time()
+        logger.info("Suppression lists synced: {}".format(dict((name, len(keys)) for name, keys in downloaded.items())))
+        self.save()
+        return dict((name, len(keys)) for name, keys in downloaded.items())
+
+    def __download(self, client, lists):
+        downloaded = {}
+        if self.EMAIL_BLACKLIST in lists:
+            keys = set()
+            for record in client.iter_emails_in_blacklist():
+                email = record.get('email') if isinstance(record, dict) else record
+                if email:
+                    keys.add(self.__email_key(email))
+            downloaded[self.EMAIL_BLACKLIST] = keys
+        if self.SMS_BLACKLIST in lists:
+            result = client.sms_get_blacklist()
+            records = result.get('data') if isinstance(result, dict) else result
+            if not isinstance(records, list):
+                raise Exception("Could not get sms blacklist: {}".format(result, ))
+            keys = set()
+            for record in records:
+                phone = record.get('phone') if isinstance(record, dict) else record
+                if phone:
+                    keys.add(self.__phone_key(phone))
+            downloaded[self.SMS_BLACKLIST] = keys
+        return downloaded
+
+    def save(self):
+        """ Write lists to file and clear journal, file is never left half written
+        """
+        if not self.path:
+            return
+        # changes are blocked until journal is cleared, so none of them is lost between file and journal
+        with self.__lock:
+            arrays = [(name, array.array('Q', self.__lists[name])) for name in self.LISTS]
+            header = {'synced_at': self.synced_at, 'lists': [[name, len(keys)] for name, keys in arrays]}
+            tmp_path = "{}.tmp".format(self.path)
+            with open(tmp_path, 'wb') as f:
+                f.write(self.__MAGIC)
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                for _, keys in arrays:
+                    if sys.byteorder == 'big':
+                        keys.byteswap()
+                    keys.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            if os.path.isfile(self.journal_path):
+                os.remove(self.journal_path)
+
+    def load(self):
+        """ Read lists from file and replay journal
+        """
+        header = {}
+        lists = {}
+        if os.path.isfile(self.path):
+            with open(self.path, 'rb') as f:
+                if f.readline() != self.__MAGIC:
+                    raise Exception("File '{}' is not a suppression list".format(self.path, ))
+                header = json.loads(f.readline().decode('utf-8'))
+                for name, size in header['lists']:
+                    keys = array.array('Q')
+                    keys.fromfile(f, size)
+                    if sys.byteorder == 'big':
+                        keys.byteswap()
+                    lists[name] = set(keys)
+        with self.__lock:
+            self.__lists.update(lists)
+            self.synced_at = header.get('synced_at')
+            broken = self.__replay_journal() if os.path.isfile(self.journal_path) else False
+        if broken:
+            # new changes must not be appended to half written line
+            self.save()
+
+    def __replay_journal(self):
+        broken = False
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    operation, list_name, keys = json.loads(line)
+                except ValueError:
+                    # last line may be half written if process was killed
+                    logger.warning("Skip broken line of suppression journal '{}'".format(self.journal_path, ))
+                    broken = True
+                    continue
+                self.__apply(operation, list_name, keys)
+        return broken
@@ -0,0 +1,183 @@
+# -*- encoding:utf8 -*-
+
+""" OAuth token management for SendPulse REST API
+"""
+
+import time
+import threading
+import logging
+import requests
+from hashlib import md5
+
+from pysendpulse.token_storage import (
+    ALLOWED_STORAGE_TYPES,
+    TokenStorage,
+    CachedTokenStorage,
+    MemcachedTokenStorage,
+    create_token_storage
+)
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+
+class TokenManager:
+    """ Thread-safe holder of SendPulse OAuth token
+
+    One object can be shared by any number of PySendPulse and AsyncPySendPulse instances and threads.
+    Only one refresh runs at a time, other callers wait for it and reuse its result.
+    Token is refreshed ahead of expiry using 'expires_in' from OAuth response.
+    """
+    MEMCACHED_VALUE_TIMEOUT = MemcachedTokenStorage.MEMCACHED_VALUE_TIMEOUT
+    ALLOWED_STORAGE_TYPES = ALLOWED_STORAGE_TYPES
+    REFRESH_MARGIN = 60
+
+    def __init__(self, user_id, secret, storage_type="FILE", token_file_path="", memcached_host="127.0.0.1:11211",
+                 api_url="https://api.sendpulse.com", session=None, timeout=None, refresh_margin=REFRESH_MARGIN,
+                 redis_url="redis://127.0.0.1:6379/0", process_cache=True):
+        """ Token manager constructor
+
+        @param user_id: string REST API ID from SendPulse settings
+        @param secret: string REST API Secret from SendPulse settings
+        @param storage_type: string FILE|MEMCACHED|MEMORY|REDIS or TokenStorage object
+        @param token_file_path: string directory for token file
+        @param memcached_host: string Host for Memcached server, default is 127.0.0.1:11211
+        @param api_url: string SendPulse REST API url
+        @param session: requests.Session object to send OAuth requests with, new one is created if not set
+        @param timeout: float|tuple timeout in seconds for OAuth request
+        @param refresh_margin: unsigned int seconds before token expiry when it is refreshed
+        @param redis_url: string Redis server url for REDIS storage
+        @param process_cache: boolean keep token in process-wide memory cache in front of storage
+        @raise: Exception empty credentials
+        """
+        if not user_id or not secret:
+            raise Exception("Empty ID or SECRET")
+        self.__user_id = user_id
+        self.__secret = secret
+        if isinstance(storage_type, TokenStorage):
+            self.__storage = storage_type
+        else:
+            self.__storage = create_token_storage(storage_type, token_file_path, memcached_host, redis_url)
+        if process_cache and not isinstance(self.__storage, CachedTokenStorage):
+            self.__storage = CachedTokenStorage(self.__storage)
+        self.__api_url = api_url
+        self.__session = session or requests.Session()
+        self.__timeout = timeout
+        self.__refresh_margin = refresh_margin
+        self.__token = None
+        self.__expires_at = None
+        self.__loaded = False
+        self.__lock = threading.Lock()
+        m = md5()
+        m.update("{}::{}".format(user_id, secret).encode('utf-8'))
+        self.__token_hash_name = m.hexdigest()
+
+    @property
+    def token_hash_name(self):
+        """ md5 of credentials, used as token key in storage
+        """
+        return self.__token_hash_name
+
+    @property
+    def storage(self):
+        """ TokenStorage object where token is kept
+        """
+        return self.__storage
+
+    def __is_expiring(self, expires_at=None):
+        expires_at = self.__expires_at if expires_at is None else expires_at
+        return expires_at is not None and time.time() >= expires_at - self.__refresh_margin
+
+    def __load_token(self):
+        """ Read token from storage into memory
+
+        @return: boolean token was found and it is not expiring
+        """
+        logger.debug("Try to get security token from '{}'".format(type(self.__storage).__name__, ))
+        try:
+            stored = self.__storage.get(self.__token_hash_name)
+        except Exception as e:
+            logger.warning("Can't read security token from storage: {}".format(e, ))
+            stored = None
+        logger.debug("Got: '{}'".format(stored, ))
+        if not stored or not stored[0] or self.__is_expiring(stored[1]):
+            return False
+        self.__token, self.__expires_at = stored
+        return True
+
+    def __store_token(self):
+        """ Write current token into storage
+        """
+        try:
+            self.__storage.set(self.__token_hash_name, self.__token, self.__expires_at)
+        except Exception as e:
+            logger.warning("Can't store security token: {}".format(e, ))
+
+    @property
+    def valid_token(self):
+        """ Token kept in memory if it is not expiring, storage and API server are not called
+
+        @return: string token or None
+        """
+        token = self.__token
+        if token and not self.__is_expiring():
+            return token
+        return None
+
+    def get_token(self):
+        """ Get valid token: from memory, from storage or from API server
+
+        @return: string token or None if it could not be obtained
+        """
+        token = self.__token
+        if token and not self.__is_expiring():
+            return token
+        if not self.__loaded:
+            with self.__lock:
+                if not self.__loaded:
+                    self.__loaded = True
+                    if self.__load_token():
+                        return self.__token
+        return self.refresh(token)
+
+    def refresh(self, stale_token=None):
+        """ Get new token from API server and store it in storage
+
+        Token already refreshed by another process and saved in storage is reused instead.
+
+        @param stale_token: string token rejected by API server, refresh is skipped if it was already replaced
+        @return: string token or None if API server did not return it
+        """
+        with self.__lock:
+            if self.__token and self.__token != stale_token and not self.__is_expiring():
+                return self.__token
+            if stale_token:
+                self.__storage.invalidate(self.__token_hash_name, stale_token)
+            if self.__load_token() and self.__token != stale_token:
+                return self.__token
+            logger.debug("Try to get new token from server")
+            data = {
+                "grant_type": "client_credentials",
+                "client_id": self.__user_id,
+                "client_secret": self.__secret,
+            }
+            try:
+                response = self.__session.post("{}/oauth/access_token".format(self.__api_url), data=json.dumps(data),
+                                               headers={'Content-Type': 'application/json'}, timeout=self.__timeout)
+            except requests.exceptions.RequestException as e:
+                logger.error("Could not get token from server: {}".format(e, ))
+                return None
+            if response.status_code != 200:
+                logger.error("Could not get token from server, http code: {}".format(response.status_code, ))
+                return None
+            result = response.json()
+            self.__token = result['access_token']
+            self.__expires_at = time.time() + int(result['expires_in']) if result.get('expires_in') else None
+            self.__loaded = True
+            logger.debug("Got: '{}'".format(self.__token, ))
+            self.__store_token()
+            return self.__token
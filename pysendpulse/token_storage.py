@@ -0,0 +1,294 @@
+# -*- encoding:utf8 -*-
+
+""" Storage backends for SendPulse OAuth token
+"""
+
+import os
+import abc
+import time
+import threading
+import logging
+import memcache
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_STORAGE_TYPES = ['FILE', 'MEMCACHED', 'MEMORY', 'REDIS']
+
+
+class TokenStorage(abc.ABC):
+    """ Base class of token storage backends
+
+    Backend keeps token and its expiry time by key. Implement get and set to add a new one.
+    """
+
+    @abc.abstractmethod
+    def get(self, key):
+        """ Read token
+
+        @param key: string token key
+        @return: tuple (token, expires_at) where expires_at is unix time or None if unknown, None if there is no token
+        """
+
+    @abc.abstractmethod
+    def set(self, key, token, expires_at=None):
+        """ Write token
+
+        @param key: string token key
+        @param token: string token
+        @param expires_at: float unix time when token expires, None if unknown
+        """
+
+    def invalidate(self, key, token):
+        """ Forget token rejected by API server, only caching storages need it
+
+        @param key: string token key
+        @param token: string rejected token
+        """
+        pass
+
+
+class MemoryTokenStorage(TokenStorage):
+    """ Token storage in memory of current process
+    """
+
+    def __init__(self):
+        self.__tokens = {}
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        with self.__lock:
+            value = self.__tokens.get(key)
+        if value and value[1] is not None and value[1] <= time.time():
+            return None
+        return value
+
+    def set(self, key, token, expires_at=None):
+        with self.__lock:
+            self.__tokens[key] = (token, expires_at)
+
+
+class FileTokenStorage(TokenStorage):
+    """ Token storage in files named by key
+
+    File contains token on the first line and expiry time on the second one.
+    It is replaced atomically and guarded by lock file, so processes never read half written token.
+    """
+
+    def __init__(self, token_file_path=""):
+        """ File storage constructor
+
+        @param token_file_path: string directory for token files, prepended to key as is
+        """
+        self.__token_file_path = token_file_path
+
+    def __lock(self, filepath, exclusive):
+        if fcntl is None:
+            return None
+        lock_file = open("{}.lock".format(filepath), 'a')
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return lock_file
+
+    @staticmethod
+    def __unlock(lock_file):
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def get(self, key):
+        filepath = "{}{}".format(self.__token_file_path, key)
+        if not os.path.isfile(filepath):
+            logger.debug("Can't find file '{}' to read security token.".format(filepath))
+            return None
+        lock_file = self.__lock(filepath, False)
+        try:
+            with open(filepath, 'r') as f:
+                lines = f.read().splitlines()
+        except IOError:
+            logger.warning("Can't read security token from '{}'.".format(filepath))
+            return None
+        finally:
+            self.__unlock(lock_file)
+        if not lines or not lines[0].strip():
+            return None
+        try:
+            expires_at = float(lines[1]) if len(lines) > 1 and lines[1].strip() else None
+        except ValueError:
+            expires_at = None
+        return lines[0].strip(), expires_at
+
+    def set(self, key, token, expires_at=None):
+        filepath = "{}{}".format(self.__token_file_path, key)
+        try:
+            if self.__token_file_path and not os.path.isdir(self.__token_file_path):
+                os.makedirs(self.__token_file_path, exist_ok=True)
+            lock_file = self.__lock(filepath, True)
+            try:
+                tmp_path = "{}.{}.tmp".format(filepath, os.getpid())
+                with open(tmp_path, 'w') as f:
+                    f.write(token)
+                    if expires_at is not None:
+                        f.write("\n{}".format(expires_at))
+                os.replace(tmp_path, filepath)
+            finally:
+                self.__unlock(lock_file)
+            logger.debug("Set token '{}' into 'FILE' '{}'".format(token, filepath))
+        except IOError:
+            logger.warning("Can't create 'FILE' to store security token. Please, check your settings.")
+
+
+class MemcachedTokenStorage(TokenStorage):
+    """ Token storage in Memcached, one client is reused for all calls
+
+    Token is kept under key itself, so older versions of this library can read it, expiry time under 'key:expires_at'.
+    """
+    MEMCACHED_VALUE_TIMEOUT = 3600
+
+    def __init__(self, memcached_host="127.0.0.1:11211"):
+        """ Memcached storage constructor
+
+        @param memcached_host: string Host for Memcached server, default is 127.0.0.1:11211
+        """
+        self.__client = memcache.Client([memcached_host])
+
+    @property
+    def client(self):
+        """ memcache.Client object used by storage
+        """
+        return self.__client
+
+    def get(self, key):
+        values = self.__client.get_multi([key, "{}:expires_at".format(key)])
+        token = values.get(key)
+        if not token:
+            return None
+        return token, values.get("{}:expires_at".format(key))
+
+    def set(self, key, token, expires_at=None):
+        logger.debug("Try to set token '{}' into 'MEMCACHED'".format(token, ))
+        timeout = int(expires_at - time.time()) if expires_at else self.MEMCACHED_VALUE_TIMEOUT
+        if timeout <= 0:
+            return
+        self.__client.set_multi({key: token, "{}:expires_at".format(key): expires_at}, timeout)
+
+
+class RedisTokenStorage(TokenStorage):
+    """ Token storage in Redis or any server speaking Redis protocol, requires redis library
+
+    Expiry time is taken from key TTL.
+    """
+    REDIS_VALUE_TIMEOUT = 3600
+
+    def __init__(self, redis_url="redis://127.0.0.1:6379/0", client=None):
+        """ Redis storage constructor
+
+        @param redis_url: string Redis server url
+        @param client: redis.Redis object to use instead of creating new one from url
+        @raise: Exception redis library is not installed
+        """
+        if client is None:
+            if redis is None:
+                raise Exception("redis library is required to use RedisTokenStorage, install it with 'pip install pysendpulse[redis]'")
+            client = redis.Redis.from_url(redis_url)
+        self.__client = client
+
+    def get(self, key):
+        pipeline = self.__client.pipeline()
+        pipeline.get(key)
+        pipeline.ttl(key)
+        token, ttl = pipeline.execute()
+        if not token:
+            return None
+        if isinstance(token, bytes):
+            token = token.decode('utf-8')
+        return token, time.time() + ttl if ttl and ttl > 0 else None
+
+    def set(self, key, token, expires_at=None):
+        timeout = int(expires_at - time.time()) if expires_at else self.REDIS_VALUE_TIMEOUT
+        if timeout > 0:
+            self.__client.set(key, token, ex=timeout)
+
+
+class CachedTokenStorage(TokenStorage):
+    """ Process-wide in-memory cache in front of another token storage
+
+    Cache is shared by all instances in the process, so only the first client built in it reads persistent storage.
+    Token is cached until its expiry or for default_ttl seconds if expiry is unknown.
+    """
+    DEFAULT_TTL = 3600
+    __cache = {}
+    __lock = threading.Lock()
+
+    def __init__(self, storage, default_ttl=DEFAULT_TTL):
+        """ Cached storage constructor
+
+        @param storage: TokenStorage object with persistent storage
+        @param default_ttl: unsigned int seconds to cache token with unknown expiry time
+        """
+        self.storage = storage
+        self.default_ttl = default_ttl
+
+    def __remember(self, key, token, expires_at):
+        cached_until = expires_at if expires_at is not None else time.time() + self.default_ttl
+        with CachedTokenStorage.__lock:
+            CachedTokenStorage.__cache[key] = (token, expires_at, cached_until)
+
+    def get(self, key):
+        with CachedTokenStorage.__lock:
+            value = CachedTokenStorage.__cache.get(key)
+        if value and value[2] > time.time():
+            return value[0], value[1]
+        stored = self.storage.get(key)
+        if stored:
+            self.__remember(key, stored[0], stored[1])
+        return stored
+
+    def set(self, key, token, expires_at=None):
+        self.__remember(key, token, expires_at)
+        self.storage.set(key, token, expires_at)
+
+    def invalidate(self, key, token):
+        with CachedTokenStorage.__lock:
+            value = CachedTokenStorage.__cache.get(key)
+            if value and value[0] == token:
+                del CachedTokenStorage.__cache[key]
+        self.storage.invalidate(key, token)
+
+    @classmethod
+    def clear(cls):
+        """ Drop all cached tokens of current process
+        """
+        with cls.__lock:
+            cls.__cache.clear()
+
+
+def create_token_storage(storage_type="FILE", token_file_path="", memcached_host="127.0.0.1:11211", redis_url="redis://127.0.0.1:6379/0"):
+    """ Create built-in token storage by name
+
+    @param storage_type: string FILE|MEMCACHED|MEMORY|REDIS
+    @param token_file_path: string directory for token file
+    @param memcached_host: string Host for Memcached server
+    @param redis_url: string Redis server url
+    @return: TokenStorage object
+    """
+    storage_type = storage_type.upper()
+    if storage_type == "MEMCACHED":
+        return MemcachedTokenStorage(memcached_host)
+    if storage_type == "MEMORY":
+        return MemoryTokenStorage()
+    if storage_type == "REDIS":
+        return RedisTokenStorage(redis_url)
+    if storage_type != "FILE":
+        logger.warning("Wrong storage type '{}'. Allowed storage types are: {}".format(storage_type, ALLOWED_STORAGE_TYPES))
+        logger.warning("Try to use 'FILE' instead.")
+    return FileTokenStorage(token_file_path)
+
@@ -24,5 +24,9 @@ setup(
     author=__author__,
     author_email=__author_email__,
     url='https://github.com/sendpulse/sendpulse-rest-api-python',
-    install_requires=install_requires
+    install_requires=install_requires,
+    extras_require={
+        'async': ['aiohttp'],
+        'redis': ['redis'],
+    }
 )